@@ -0,0 +1,5 @@
+"""
+Benchmarks for the BRD backend. Run from the backend directory, e.g.
+
+    python -m benchmarks.startup
+"""
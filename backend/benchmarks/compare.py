@@ -0,0 +1,66 @@
+"""
+Compare two benchmark result files written by benchmarks.suite.
+
+    python -m benchmarks.compare benchmarks/results/abc123.json benchmarks/results/def456.json
+
+Prints the per-stage median time and peak memory change for every scenario
+present in both files. Changes above --threshold (default 10%) are flagged;
+--fail-on-regression exits with status 1 if any are found (for CI).
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def _change(old: float, new: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+
+def compare(old: dict, new: dict, threshold: float) -> list:
+    """Return a list of regression descriptions and print the comparison table."""
+    regressions = []
+    print(f"old: {old['meta']['commit']}  new: {new['meta']['commit']}")
+    for name, new_result in new["scenarios"].items():
+        old_result = old["scenarios"].get(name)
+        if old_result is None:
+            continue
+        print(f"\n{name}")
+        print(f"  {'stage':14s} {'old ms':>10s} {'new ms':>10s} {'time':>8s} {'old MB':>8s} {'new MB':>8s} {'mem':>8s}")
+        for stage, new_stage in new_result["stages"].items():
+            old_stage = old_result["stages"].get(stage)
+            if old_stage is None:
+                continue
+            time_change = _change(old_stage["median_s"], new_stage["median_s"])
+            mem_change = _change(old_stage["peak_mb"], new_stage["peak_mb"])
+            flag = ""
+            if time_change > threshold or mem_change > threshold:
+                flag = "  REGRESSION"
+                regressions.append(f"{name}/{stage}: time {time_change:+.1f}%, memory {mem_change:+.1f}%")
+            print(
+                f"  {stage:14s} {old_stage['median_s'] * 1000:10.1f} {new_stage['median_s'] * 1000:10.1f} "
+                f"{time_change:+7.1f}% {old_stage['peak_mb']:8.1f} {new_stage['peak_mb']:8.1f} {mem_change:+7.1f}%{flag}"
+            )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change flagged as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    old = json.loads(Path(args.old).read_text())
+    new = json.loads(Path(args.new).read_text())
+    regressions = compare(old, new, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold}%:")
+        for line in regressions:
+            print(f"  {line}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Output compression benchmark: save time and file size of a rendered BRD
+under each docx compression policy (store, fast, default, best).
+
+The document is parsed and rendered once per scenario; only the save is
+repeated, so the numbers isolate what the policy costs.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.compression                     # 5k and 20k rows
+    python -m benchmarks.compression --rows 50000 --description-length 400 --repeat 3
+"""
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks.generators import make_template, make_workbook  # noqa: E402
+
+
+def _render(rows: int, description_length: int, images: int):
+    from docx import Document  # type: ignore
+
+    from docx_renderer import _fill_requirements_table
+    from excel_parser import parse_excel_to_requirements
+
+    groups = parse_excel_to_requirements(
+        make_workbook(rows=rows, forms=max(1, rows // 100), description_length=description_length)
+    )
+    doc = Document(BytesIO(make_template(tables=11, images=images)))
+    _fill_requirements_table(doc, groups)
+    return doc
+
+
+def run(rows: int, description_length: int, images: int, repeat: int) -> dict:
+    from docx_renderer import COMPRESSION_POLICIES, save_docx
+
+    doc = _render(rows, description_length, images)
+    results = {}
+    for policy in COMPRESSION_POLICIES:
+        save_docx(doc, policy)  # warm up
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            out = save_docx(doc, policy)
+            times.append(time.perf_counter() - started)
+        results[policy] = {
+            "median_s": round(statistics.median(times), 4),
+            "bytes": out.getbuffer().nbytes,
+        }
+    return {"rows": rows, "description_length": description_length, "policies": results}
+
+
+def main(argv=None) -> list:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="5000,20000", help="comma-separated row counts")
+    parser.add_argument("--description-length", type=int, default=200)
+    parser.add_argument("--images", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("brd-utility").setLevel(logging.WARNING)
+
+    reports = []
+    for rows in (int(r) for r in args.rows.split(",") if r.strip()):
+        report = run(rows, args.description_length, args.images, args.repeat)
+        reports.append(report)
+        baseline = report["policies"]["default"]
+        print(f"\n{rows} rows, {args.description_length}-char descriptions")
+        print(f"{'policy':<10}{'save s':>10}{'size MB':>10}{'vs default':>14}")
+        for policy, result in report["policies"].items():
+            print(
+                f"{policy:<10}{result['median_s']:>10.3f}{result['bytes'] / 2**20:>10.2f}"
+                f"{result['median_s'] / baseline['median_s']:>8.2f}x time"
+            )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(reports, indent=2))
+    return reports
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Synthetic inputs for benchmarks: requirement workbooks and BRD templates.
+
+Both generators are deterministic for a given seed, so results from two
+commits are measured on byte-identical inputs.
+"""
+import random
+import struct
+import zlib
+from io import BytesIO
+from typing import Dict, Optional
+
+HEADERS = ["Form", "Req ID#*", "Section*", "Description *", "Status *"]
+DEFAULT_STATUS_MIX = {"Final": 0.5, "Approved": 0.3, "Draft": 0.2}
+SECTIONS = ["General", "Data Entry", "Validation", "Reporting", "Security", "Audit Trail", "Workflow"]
+_WORDS = (
+    "system shall allow user to enter record field value when form is saved display "
+    "error message if date later than visit site subject query data manager review "
+    "audit trail entry required optional calculated derived hidden read only"
+).split()
+
+
+def _sentence(rng: random.Random, length: int) -> str:
+    words = []
+    size = 0
+    while size < length:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:length].capitalize()
+
+
+def make_workbook(
+    rows: int = 1000,
+    forms: int = 10,
+    sheets: int = 1,
+    description_length: int = 80,
+    status_mix: Optional[Dict[str, float]] = None,
+    form_on_every_row: bool = True,
+    seed: int = 0,
+) -> bytes:
+    """
+    Build an .xlsx with `sheets` requirement sheets of `rows` rows each.
+
+    Rows are split evenly into `forms` form blocks. With form_on_every_row=False
+    only the first row of each block carries the Form value, as in hand-made
+    sheets where Form is a merged-looking heading.
+    """
+    import openpyxl
+
+    rng = random.Random(seed)
+    mix = status_mix or DEFAULT_STATUS_MIX
+    statuses, weights = list(mix), list(mix.values())
+    rows_per_form = max(1, -(-rows // max(1, forms)))
+
+    workbook = openpyxl.Workbook(write_only=True)
+    for sheet_index in range(sheets):
+        sheet = workbook.create_sheet(f"Requirements {sheet_index + 1}" if sheets > 1 else "Requirements")
+        sheet.append(HEADERS)
+        for i in range(rows):
+            form_index, position = divmod(i, rows_per_form)
+            form = f"Form {form_index + 1:03d}" if form_on_every_row or position == 0 else None
+            sheet.append([
+                form,
+                f"PRJ_{form_index + 1:02d}.{position + 1}",
+                rng.choice(SECTIONS),
+                _sentence(rng, description_length),
+                rng.choices(statuses, weights)[0],
+            ])
+    out = BytesIO()
+    workbook.save(out)
+    return out.getvalue()
+
+
+def make_png(width: int = 200, height: int = 100, seed: int = 0) -> bytes:
+    """A noisy RGB PNG (noise keeps it realistically incompressible)."""
+    rng = random.Random(seed)
+    raw = b"".join(b"\x00" + rng.randbytes(width * 3) for _ in range(height))
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
+
+
+def make_template(tables: int = 11, images: int = 2, filler_rows: int = 5, seed: int = 0) -> bytes:
+    """
+    Build a BRD-like .docx: `tables - 1` filler tables, `images` embedded
+    PNGs and a Functional Requirements table with the expected headers.
+    """
+    from docx import Document
+    from docx.shared import Inches
+
+    rng = random.Random(seed)
+    doc = Document()
+    doc.add_heading("Business Requirements Document", level=0)
+
+    for t in range(max(0, tables - 1)):
+        doc.add_heading(f"Section {t + 1}", level=1)
+        doc.add_paragraph(_sentence(rng, 200))
+        table = doc.add_table(rows=filler_rows + 1, cols=3)
+        for c, header in enumerate(("Item", "Value", "Notes")):
+            table.rows[0].cells[c].text = header
+        for r in range(1, filler_rows + 1):
+            for c in range(3):
+                table.rows[r].cells[c].text = _sentence(rng, 20)
+
+    for i in range(images):
+        doc.add_picture(BytesIO(make_png(seed=seed + i)), width=Inches(2))
+
+    doc.add_heading("Functional Requirements", level=1)
+    table = doc.add_table(rows=2, cols=4)
+    for c, header in enumerate(("Requirement ID", "Section", "Description", "Status")):
+        table.rows[0].cells[c].text = header
+    table.rows[1].cells[0].text = "PLACEHOLDER"
+
+    out = BytesIO()
+    doc.save(out)
+    return out.getvalue()
@@ -0,0 +1,334 @@
+"""
+Load test: mixed login, /api/auth/me and /generate traffic against one instance.
+
+By default the harness starts its own uvicorn process backed by a throwaway
+SQLite user store (DB_BACKEND=sqlite), so no SQL Server is needed. It
+registers a pool of users, mints their JWTs locally with the server's
+SECRET_KEY, then runs --concurrency client threads for --duration seconds.
+Each request is chosen at random from the traffic mix:
+
+- login: POST /api/auth/login (bcrypt verification on every call)
+- me: GET /api/auth/me with a minted token
+- generate:<size>: POST /generate with a synthetic workbook of that size
+
+Reported per endpoint: request count, throughput, error rate, status codes
+and latency percentiles (p50/p90/p95/p99/max).
+
+Usage (from the backend directory):
+
+    python -m benchmarks.loadtest --concurrency 8 --duration 30
+    python -m benchmarks.loadtest --mix login=1,me=4,generate=2 --sizes small=50,large=2000
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --secret-key ...   # existing server
+
+With --url the server must use the same SECRET_KEY (for minted tokens) and
+accept registration of the load-test users.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import uuid
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks.generators import make_workbook  # noqa: E402
+from benchmarks.startup import _free_port  # noqa: E402
+
+DEFAULT_MIX = "login=1,me=5,generate=2"
+DEFAULT_SIZES = "small=50,medium=500,large=2000"
+PERCENTILES = (50, 90, 95, 99)
+LOADTEST_SECRET_KEY = "loadtest-secret-key"
+PASSWORD = "loadtest-password"
+
+
+def _parse_weights(text: str, cast=float) -> dict:
+    weights = {}
+    for item in text.split(","):
+        name, _, value = item.partition("=")
+        if name.strip():
+            weights[name.strip()] = cast(value) if value else cast(1)
+    return weights
+
+
+# ------------------------------------------------------------------------------
+# Server under test
+# ------------------------------------------------------------------------------
+def start_server(sqlite_path: str, secret_key: str, workers: int, timeout: float = 60.0):
+    """Spawn uvicorn on a free port with a SQLite user store; returns (process, base URL)."""
+    port = _free_port()
+    env = dict(os.environ)
+    env.update({
+        "DB_BACKEND": "sqlite",
+        "SQLITE_PATH": sqlite_path,
+        "DB_INIT_MODE": "migrate",
+        "SECRET_KEY": secret_key,
+        # Every /generate of a size posts the same workbook; coalescing would
+        # merge concurrent ones into one generation and overstate throughput
+        "COALESCE_GENERATIONS": "false",
+    })
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {proc.returncode}")
+        try:
+            status, _ = Client(base_url).request("GET", "/health")
+            if status == 200:
+                return proc, base_url
+        except OSError:
+            time.sleep(0.05)
+    proc.terminate()
+    raise TimeoutError(f"server did not answer /health within {timeout}s")
+
+
+def stop_server(proc) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+# ------------------------------------------------------------------------------
+# HTTP client (stdlib only, one keep-alive connection per thread)
+# ------------------------------------------------------------------------------
+class Client:
+    def __init__(self, base_url: str, timeout: float = 300.0):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.timeout = timeout
+        self._conn = None
+
+    def request(self, method: str, path: str, body: bytes = None, headers: dict = None):
+        """Returns (status, response body). Reconnects once if the connection dropped."""
+        for attempt in (1, 2):
+            if self._conn is None:
+                self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self._conn.request(method, path, body=body, headers=headers or {})
+                response = self._conn.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, ConnectionError):
+                self._conn.close()
+                self._conn = None
+                if attempt == 2:
+                    raise
+
+    def post_json(self, path: str, payload: dict, headers: dict = None):
+        return self.request("POST", path, json.dumps(payload).encode(),
+                            {"Content-Type": "application/json", **(headers or {})})
+
+
+def multipart(files: dict, fields: dict = None):
+    """Encode {name: (filename, bytes)} and {name: value} as multipart/form-data."""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in (fields or {}).items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, data) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n".encode() + data + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+# ------------------------------------------------------------------------------
+# Traffic
+# ------------------------------------------------------------------------------
+def seed_users(base_url: str, count: int, secret_key: str) -> list:
+    """Register `count` users and mint a token for each: [(username, token), ...]."""
+    from jose import jwt
+
+    client = Client(base_url)
+    run_id = uuid.uuid4().hex[:8]
+    users = []
+    for i in range(count):
+        username = f"load_{run_id}_{i}"
+        status, body = client.post_json("/api/auth/register", {
+            "username": username, "email": f"{username}@example.com", "password": PASSWORD,
+        })
+        if status != 200:
+            raise RuntimeError(f"registering {username} failed: {status} {body[:200]!r}")
+        user_id = jwt.get_unverified_claims(json.loads(body)["access_token"]).get("user_id")
+        token = jwt.encode(
+            {"sub": username, "user_id": user_id, "exp": int(time.time()) + 24 * 3600}, secret_key, algorithm="HS256",
+        )
+        users.append((username, token))
+    return users
+
+
+class Recorder:
+    """Thread-safe (endpoint, status, latency) samples."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+
+    def add(self, endpoint: str, status, seconds: float) -> None:
+        with self._lock:
+            self.samples.setdefault(endpoint, []).append((status, seconds))
+
+
+def run_load(base_url: str, users: list, workbooks: dict, mix: dict, concurrency: int,
+             duration: float, seed: int) -> tuple:
+    endpoints = []
+    for name, weight in mix.items():
+        if name == "generate":
+            endpoints += [(f"generate:{size}", weight / len(workbooks)) for size in workbooks]
+        else:
+            endpoints.append((name, weight))
+    names, weights = [e[0] for e in endpoints], [e[1] for e in endpoints]
+
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+
+    def worker(index: int):
+        rng = random.Random(seed + index)
+        client = Client(base_url)
+        while time.perf_counter() < deadline:
+            endpoint = rng.choices(names, weights)[0]
+            username, token = rng.choice(users)
+            auth = {"Authorization": f"Bearer {token}"}
+            start = time.perf_counter()
+            try:
+                if endpoint == "login":
+                    status, _ = client.post_json("/api/auth/login", {"username": username, "password": PASSWORD})
+                elif endpoint == "me":
+                    status, _ = client.request("GET", "/api/auth/me", headers=auth)
+                else:
+                    size = endpoint.split(":", 1)[1]
+                    body, content_type = multipart({"excel": (f"{size}.xlsx", workbooks[size])})
+                    status, _ = client.request("POST", "/generate", body, {"Content-Type": content_type, **auth})
+            except Exception as e:
+                status = type(e).__name__
+            recorder.add(endpoint, status, time.perf_counter() - start)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder.samples, time.perf_counter() - started
+
+
+# ------------------------------------------------------------------------------
+# Report
+# ------------------------------------------------------------------------------
+def _percentile(sorted_values: list, pct: float) -> float:
+    # Nearest-rank percentile
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples: dict, elapsed: float) -> dict:
+    report = {}
+    for endpoint, entries in sorted(samples.items()):
+        latencies = sorted(seconds for _, seconds in entries)
+        statuses = {}
+        for status, _ in entries:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        errors = sum(1 for status, _ in entries if not (isinstance(status, int) and status < 400))
+        report[endpoint] = {
+            "requests": len(entries),
+            "throughput_rps": round(len(entries) / elapsed, 2),
+            "error_rate": round(errors / len(entries), 4),
+            "statuses": statuses,
+            "latency_ms": {
+                **{f"p{p}": round(_percentile(latencies, p) * 1000, 1) for p in PERCENTILES},
+                "max": round(latencies[-1] * 1000, 1),
+            },
+        }
+    return report
+
+
+def _print_report(report: dict, elapsed: float) -> None:
+    header = f"{'endpoint':18s} {'reqs':>6} {'rps':>8} {'err%':>6} " + " ".join(f"{'p' + str(p):>8}" for p in PERCENTILES) + f" {'max':>8}"
+    print(header)
+    print("-" * len(header))
+    total = 0
+    for endpoint, r in report.items():
+        total += r["requests"]
+        latency = r["latency_ms"]
+        print(
+            f"{endpoint:18s} {r['requests']:>6} {r['throughput_rps']:>8.2f} {r['error_rate'] * 100:>5.1f}% "
+            + " ".join(f"{latency['p' + str(p)]:>8.1f}" for p in PERCENTILES)
+            + f" {latency['max']:>8.1f}"
+        )
+    print(f"\n{total} requests in {elapsed:.1f}s ({total / elapsed:.2f} req/s overall); latencies in ms")
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="target an already running server instead of starting one")
+    parser.add_argument("--secret-key", default=None, help="server SECRET_KEY for minting tokens (with --url)")
+    parser.add_argument("--server-workers", type=int, default=1, help="uvicorn workers for the spawned server")
+    parser.add_argument("--concurrency", type=int, default=8, help="client threads")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load")
+    parser.add_argument("--users", type=int, default=20, help="users to register and rotate through")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="endpoint weights, e.g. login=1,me=5,generate=2")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="workbook sizes for /generate as name=rows")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    mix = _parse_weights(args.mix)
+    unknown = set(mix) - {"login", "me", "generate"}
+    if unknown:
+        parser.error(f"unknown endpoint(s) in --mix: {sorted(unknown)}")
+    sizes = _parse_weights(args.sizes, int)
+    workbooks = {name: make_workbook(rows=rows, forms=max(1, rows // 50), seed=args.seed) for name, rows in sizes.items()}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        proc = None
+        if args.url:
+            base_url = args.url.rstrip("/")
+            secret_key = args.secret_key or os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production")
+        else:
+            secret_key = args.secret_key or LOADTEST_SECRET_KEY
+            proc, base_url = start_server(os.path.join(tmp, "loadtest_users.db"), secret_key, args.server_workers)
+        try:
+            users = seed_users(base_url, args.users, secret_key)
+            print(f"Running {args.concurrency} clients for {args.duration:.0f}s against {base_url} (mix {mix}, sizes {sizes})")
+            samples, elapsed = run_load(base_url, users, workbooks, mix, args.concurrency, args.duration, args.seed)
+        finally:
+            if proc is not None:
+                stop_server(proc)
+
+    report = summarize(samples, elapsed)
+    _print_report(report, elapsed)
+    results = {
+        "config": {
+            "concurrency": args.concurrency, "duration_s": args.duration, "users": args.users,
+            "server_workers": None if args.url else args.server_workers, "mix": mix, "sizes": sizes,
+            "workbook_bytes": {name: len(data) for name, data in workbooks.items()},
+        },
+        "elapsed_s": round(elapsed, 2),
+        "endpoints": report,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Results written to {args.output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Startup-time benchmark: how long until the app can answer /health.
+
+Each run uses a fresh interpreter so nothing is cached in sys.modules:
+
+- import: time to `import main`, which heavy modules that pulled in, and the
+  cost of the deferred Excel/Word imports that now happen after startup.
+- serve: time from spawning uvicorn until GET /health returns 200.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.startup --runs 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = ("pandas", "openpyxl", "docx", "lxml", "pyodbc")
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+import_main = time.perf_counter() - start
+loaded = [m for m in {heavy!r} if m in sys.modules]
+start = time.perf_counter()
+import excel_parser, openpyxl, docx_renderer
+deferred = time.perf_counter() - start
+print(json.dumps({{"import_main_s": import_main, "deferred_imports_s": deferred, "heavy_loaded_by_main": loaded}}))
+"""
+
+
+def _bench_env(sqlite_path: str) -> dict:
+    env = dict(os.environ)
+    env.setdefault("DB_BACKEND", "sqlite")
+    env.setdefault("SQLITE_PATH", sqlite_path)
+    return env
+
+
+def measure_import(env: dict) -> dict:
+    probe = _IMPORT_PROBE.format(heavy=HEAVY_MODULES)
+    out = subprocess.run(
+        [sys.executable, "-c", probe],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_serve(env: dict, timeout: float = 60.0) -> float:
+    """Seconds from process spawn until /health answers 200."""
+    port = _free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}/health"
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"/health did not respond within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def _summary(values: list) -> dict:
+    return {
+        "median_s": round(statistics.median(values), 4),
+        "min_s": round(min(values), 4),
+        "max_s": round(max(values), 4),
+    }
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--skip-serve", action="store_true", help="only measure import cost")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = _bench_env(os.path.join(tmp, "bench_users.db"))
+        imports = [measure_import(env) for _ in range(args.runs)]
+        results = {
+            "runs": args.runs,
+            "python": sys.version.split()[0],
+            "import_main": _summary([r["import_main_s"] for r in imports]),
+            "deferred_imports": _summary([r["deferred_imports_s"] for r in imports]),
+            "heavy_loaded_by_main": sorted({m for r in imports for m in r["heavy_loaded_by_main"]}),
+        }
+        if not args.skip_serve:
+            results["time_to_health"] = _summary([measure_serve(env) for _ in range(args.runs)])
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Generation benchmark suite: parse, render and save throughput plus peak
+memory per stage, on synthetic workbooks and templates.
+
+Timings come from the same stage timers the API reports in Server-Timing
+(read_excel, row_loop, template_load, render_table, save), so the numbers
+line up with production metrics. Peak memory is measured in a separate
+tracemalloc run because tracing slows Python down considerably. tracemalloc
+only sees Python allocations, not the libxml2 memory behind python-docx's
+lxml trees, so the process peak RSS is recorded alongside it.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.suite                       # default scenarios
+    python -m benchmarks.suite --scenarios large     # 20k rows, slow
+    python -m benchmarks.suite --scenarios small,medium --repeat 5
+    python -m benchmarks.compare old.json new.json   # compare two runs
+
+Results are written to benchmarks/results/<commit>.json unless --output is given.
+"""
+import argparse
+import datetime
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks.generators import make_template, make_workbook  # noqa: E402
+from metrics import StageTimer  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+SCENARIOS = {
+    "small": {"rows": 200, "forms": 5, "tables": 5, "images": 0},
+    "medium": {"rows": 5000, "forms": 50, "tables": 11, "images": 2},
+    "large": {"rows": 20000, "forms": 200, "tables": 11, "images": 4},
+    "long_text": {"rows": 5000, "forms": 50, "description_length": 1000, "tables": 11, "images": 2},
+    "multi_sheet": {"rows": 5000, "forms": 50, "sheets": 4, "tables": 11, "images": 2},
+}
+
+DEFAULT_SCENARIOS = ("small", "medium", "long_text", "multi_sheet")
+
+WORKBOOK_KEYS = ("rows", "forms", "sheets", "description_length", "status_mix", "form_on_every_row", "seed")
+TEMPLATE_KEYS = ("tables", "images", "filler_rows", "seed")
+
+
+class MemoryStageTimer(StageTimer):
+    """StageTimer that also records the tracemalloc peak of each stage."""
+
+    def __init__(self, endpoint: str = "benchmark"):
+        super().__init__(endpoint)
+        self.peaks = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        with super().stage(name):
+            yield
+        self.peaks[name] = tracemalloc.get_traced_memory()[1] - baseline
+
+
+def _sheet_names(workbook: bytes) -> list:
+    from xlsx_inspect import list_sheets, open_package
+
+    with open_package(workbook) as zf:
+        return [name for name, _ in list_sheets(zf)]
+
+
+def run_pipeline(workbook: bytes, template: bytes, timer) -> tuple:
+    """
+    Parse + render + save once. Returns (requirement count, output bytes).
+    A multi-sheet workbook has every sheet parsed, in one pandas call as for
+    /generate table bindings, and all their requirements rendered.
+    """
+    from excel_parser import parse_excel_tables, parse_excel_to_requirements
+    from docx_renderer import render_docx
+    from table_bindings import TableBinding
+
+    sheets = _sheet_names(workbook)
+    if len(sheets) > 1:
+        specs = [TableBinding(headers=(), sheet=name) for name in sheets]
+        groups = [group for sheet_groups in parse_excel_tables(workbook, specs, timer=timer) for group in sheet_groups]
+    else:
+        groups = parse_excel_to_requirements(workbook, filter_mode="none", timer=timer)
+    output = render_docx(template, groups, timer=timer)
+    return sum(len(g["requirements"]) for g in groups), output.getbuffer().nbytes
+
+
+def run_scenario(name: str, params: dict, repeat: int) -> dict:
+    workbook = make_workbook(**{k: v for k, v in params.items() if k in WORKBOOK_KEYS})
+    template = make_template(**{k: v for k, v in params.items() if k in TEMPLATE_KEYS})
+
+    # Warm imports and caches so the first timed run is not an outlier
+    run_pipeline(workbook, template, StageTimer("benchmark"))
+
+    samples = {}
+    for _ in range(repeat):
+        timer = StageTimer("benchmark")
+        rows, output_bytes = run_pipeline(workbook, template, timer)
+        for stage, seconds in timer.stages:
+            samples.setdefault(stage, []).append(seconds)
+
+    memory_timer = MemoryStageTimer()
+    tracemalloc.start()
+    try:
+        run_pipeline(workbook, template, memory_timer)
+    finally:
+        tracemalloc.stop()
+
+    stages = {
+        stage: {
+            "median_s": round(statistics.median(values), 5),
+            "min_s": round(min(values), 5),
+            "peak_mb": round(memory_timer.peaks.get(stage, 0) / 2**20, 2),
+        }
+        for stage, values in samples.items()
+    }
+    parse_s = stages["read_excel"]["median_s"] + stages["row_loop"]["median_s"]
+    render_s = stages["template_load"]["median_s"] + stages["render_table"]["median_s"]
+    return {
+        "params": params,
+        "workbook_bytes": len(workbook),
+        "template_bytes": len(template),
+        "requirements": rows,
+        "output_bytes": output_bytes,
+        "stages": stages,
+        "throughput": {
+            "parse_rows_per_s": round(rows / parse_s, 1) if parse_s else None,
+            "render_rows_per_s": round(rows / render_s, 1) if render_s else None,
+            "save_mb_per_s": round(output_bytes / 2**20 / stages["save"]["median_s"], 2) if stages["save"]["median_s"] else None,
+        },
+    }
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    return round(peak / 2**20 if sys.platform == "darwin" else peak / 2**10, 1)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(DEFAULT_SCENARIOS), help="comma-separated scenario names")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<commit>.json)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("brd-utility").setLevel(logging.WARNING)
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {unknown}; choose from {sorted(SCENARIOS)}")
+
+    commit = _git_commit()
+    results = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "scenarios": {},
+    }
+    for name in names:
+        start = time.perf_counter()
+        results["scenarios"][name] = result = run_scenario(name, SCENARIOS[name], args.repeat)
+        print(
+            f"{name:12s} {result['requirements']:>7} reqs  "
+            + "  ".join(f"{stage}={s['median_s'] * 1000:.1f}ms/{s['peak_mb']}MB" for stage, s in result["stages"].items())
+            + f"  ({time.perf_counter() - start:.1f}s)"
+        )
+
+    results["meta"]["peak_rss_mb"] = _peak_rss_mb()
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"Results written to {output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
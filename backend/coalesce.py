@@ -0,0 +1,102 @@
+"""
+Single-flight coalescing of identical concurrent requests.
+
+When several users upload the same shared workbook within seconds, each
+/generate would parse and render it separately. SingleFlight runs the work
+once per key: the first caller starts it as a task, and callers arriving
+with the same key while it is in flight await that task and receive the
+same result (or the same exception). The key is dropped as soon as the
+task finishes, so nothing is cached beyond the in-flight window.
+
+The key covers the inputs, not the caller, so users share a generation.
+Errors that depend on the caller rather than the inputs (rerun_on) are
+not shared: each follower retries on its own behalf.
+
+The task is shielded from the callers: a client that disconnects does not
+cancel the computation the others are waiting on.
+
+COALESCE_GENERATIONS=false disables coalescing.
+"""
+import asyncio
+import hashlib
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from metrics import REGISTRY, Counter, FunctionMetric
+
+load_dotenv()
+
+COALESCE_GENERATIONS = os.getenv("COALESCE_GENERATIONS", "true").lower() in ("1", "true", "yes")
+
+
+def request_key(*parts: Optional[bytes | str]) -> str:
+    """Digest of the request inputs; None and "" are distinct from each other."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if part is None:
+            digest.update(b"\x00")
+            continue
+        data = part.encode() if isinstance(part, str) else part
+        digest.update(b"\x01" + len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class SingleFlight:
+    """At most one in-flight computation per key."""
+
+    def __init__(self, endpoint: str, enabled: bool = True):
+        self.endpoint = endpoint
+        self.enabled = enabled
+        self._flights: Dict[str, asyncio.Task] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def run(
+        self, key: str, factory: Callable[[], Awaitable[Any]], rerun_on: Tuple[type, ...] = ()
+    ) -> Tuple[Any, bool]:
+        """
+        Await factory() for key, or join the identical call already running.
+        Returns (result, leader) where leader is False for coalesced callers.
+
+        A follower whose leader failed with one of rerun_on runs its own
+        factory() instead of receiving that error: for refusals that depend
+        on who asked (the leader's per-user queue limit, say), not on the
+        shared inputs.
+        """
+        if not self.enabled:
+            return await factory(), True
+
+        task = self._flights.get(key)
+        leader = task is None
+        if leader:
+            task = asyncio.ensure_future(factory())
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            COALESCED.inc(endpoint=self.endpoint)
+        try:
+            return await asyncio.shield(task), leader
+        except rerun_on:
+            if leader:
+                raise
+            return await factory(), True
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        # Mark the exception retrieved in case every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+
+generation_flights = SingleFlight("generate", enabled=COALESCE_GENERATIONS)
+
+COALESCED = REGISTRY.register(Counter(
+    "brd_coalesced_requests_total", "Requests served by joining an identical in-flight computation", ("endpoint",)))
+REGISTRY.register(FunctionMetric(
+    "brd_inflight_generations", "Distinct generations currently in flight", lambda: generation_flights.in_flight))
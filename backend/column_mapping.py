@@ -0,0 +1,215 @@
+"""
+Column mapping profiles: which sheet headers feed which requirement field.
+
+A profile lists, per field (form, req_id, section, description, status),
+exact header aliases and/or regex patterns. Headers are compared after
+normalization: lowercase, "*" required-markers removed, whitespace
+collapsed, so "Req ID#*" and "req id #" style variations need one alias.
+
+Each profile is compiled once into a ColumnMatcher: one dict for all
+aliases plus one alternation regex for all patterns, so a header row is
+resolved in a single pass. The header row itself is found by scanning only
+the first HEADER_SCAN_ROWS rows for the row that resolves every required
+field, so title rows or notes above the table are skipped.
+
+Profiles beyond the built-in "default" are loaded from the JSON file named
+by COLUMN_MAPPINGS_FILE (see column_mappings.example.json):
+
+    {"profiles": {"<name>": {"fields": {"req_id": {"aliases": [...], "patterns": [...]}, ...},
+                             "optional": ["form"]}}}
+
+The sort_by/group_by options that excel_parser orders requirements by are
+checked here too, by resolve_ordering(), so requests can be validated
+without importing pandas. natural_key() is the req_id order shared by the
+parser and the search index.
+"""
+import json
+import logging
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger("brd-utility")
+
+COLUMN_MAPPINGS_FILE = os.getenv("COLUMN_MAPPINGS_FILE", "")
+DEFAULT_COLUMN_PROFILE = os.getenv("COLUMN_PROFILE", "default")
+HEADER_SCAN_ROWS = int(os.getenv("HEADER_SCAN_ROWS", "20"))
+
+FIELDS = ("form", "req_id", "section", "description", "status")
+
+# Requirement ordering options (applied by excel_parser) and their defaults
+SORT_KEYS = ("sheet", "req_id", "section")
+GROUP_KEYS = ("form", "section")
+REQUIREMENT_SORT = os.getenv("REQUIREMENT_SORT", "sheet")
+REQUIREMENT_GROUP = os.getenv("REQUIREMENT_GROUP", "form")
+
+# Matches the headers the parser has always expected; any header containing
+# "status" counts as the status column
+DEFAULT_PROFILE = {
+    "fields": {
+        "form": {"aliases": ["form"]},
+        "req_id": {"aliases": ["req id#", "req id"]},
+        "section": {"aliases": ["section"]},
+        "description": {"aliases": ["description"]},
+        "status": {"patterns": ["status"]},
+    },
+}
+
+
+def normalize_header_text(header) -> str:
+    """Lowercase, drop "*" markers and collapse whitespace."""
+    if header is None:
+        return ""
+    return " ".join(str(header).replace("*", " ").lower().split())
+
+
+def resolve_ordering(sort_by: Optional[str], group_by: Optional[str]) -> Tuple[str, str]:
+    """(sort_by, group_by) with the defaults filled in; raises ValueError for an unknown key."""
+    sort_by = sort_by or REQUIREMENT_SORT
+    group_by = group_by or REQUIREMENT_GROUP
+    if sort_by not in SORT_KEYS:
+        raise ValueError(f"sort_by must be one of {list(SORT_KEYS)}")
+    if group_by not in GROUP_KEYS:
+        raise ValueError(f"group_by must be one of {list(GROUP_KEYS)}")
+    return sort_by, group_by
+
+
+_DIGITS_RE = re.compile(r"(\d+)")
+
+
+def natural_key(text: str) -> tuple:
+    """
+    Sort key comparing digit runs as numbers: "PRJ_01.2" < "PRJ_01.10".
+    Text and number parts alternate starting with text, so any two keys
+    compare like with like.
+    """
+    parts = _DIGITS_RE.split(text.lower())
+    parts[1::2] = map(int, parts[1::2])
+    return tuple(parts)
+
+
+class ColumnMatcher:
+    """A compiled profile: resolves a header row to {field: column index}."""
+
+    def __init__(self, name: str, profile: dict):
+        self.name = name
+        fields = profile.get("fields", {})
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Column profile '{name}' has unknown fields: {sorted(unknown)}")
+        self.optional = frozenset(profile.get("optional", ()))
+        self.required = tuple(f for f in FIELDS if f not in self.optional)
+
+        self._aliases: Dict[str, str] = {}
+        patterns = []
+        self._group_fields: Dict[str, str] = {}
+        for field, spec in fields.items():
+            for alias in spec.get("aliases", ()):
+                self._aliases.setdefault(normalize_header_text(alias), field)
+            for index, pattern in enumerate(spec.get("patterns", ())):
+                try:
+                    re.compile(pattern)
+                except re.error as e:
+                    raise ValueError(f"Column profile '{name}' field '{field}' has an invalid pattern {pattern!r}: {e}")
+                group = f"{field}_{index}"
+                patterns.append(f"(?P<{group}>{pattern})")
+                self._group_fields[group] = field
+        try:
+            self._pattern = re.compile("|".join(patterns)) if patterns else None
+        except re.error as e:
+            # Each pattern compiles alone, so this is a clash between them (e.g. group names)
+            raise ValueError(f"Column profile '{name}' patterns cannot be combined: {e}")
+
+        # First alias names the field in error messages
+        self.labels = {
+            field: (spec.get("aliases") or spec.get("patterns") or [field])[0] for field, spec in fields.items()
+        }
+
+    def match(self, header) -> Optional[str]:
+        text = normalize_header_text(header)
+        if not text:
+            return None
+        field = self._aliases.get(text)
+        if field is None and self._pattern is not None:
+            found = self._pattern.search(text)
+            if found:
+                field = self._group_fields[found.lastgroup]
+        return field
+
+    def resolve(self, headers: Sequence) -> Dict[str, int]:
+        """{field: column index} for one header row; the first matching column wins."""
+        columns: Dict[str, int] = {}
+        for index, header in enumerate(headers):
+            field = self.match(header)
+            if field is not None and field not in columns:
+                columns[field] = index
+        return columns
+
+    def missing(self, columns: Dict[str, int]) -> List[str]:
+        return [self.labels.get(f, f) for f in self.required if f not in columns]
+
+    def detect_header_row(
+        self, rows: Iterable[Sequence], scan_rows: int = HEADER_SCAN_ROWS
+    ) -> Tuple[Optional[int], Dict[str, int]]:
+        """
+        (row index, columns) of the first of the first scan_rows rows that
+        resolves every required field, or (None, columns of the row that
+        matched the most fields) if there is none.
+        """
+        best: Dict[str, int] = {}
+        for row_index, row in enumerate(rows):
+            if row_index >= scan_rows:
+                break
+            columns = self.resolve(row)
+            if not self.missing(columns):
+                return row_index, columns
+            if len(columns) > len(best):
+                best = columns
+        return None, best
+
+    def find_header_row(self, rows: Iterable[Sequence], scan_rows: int = HEADER_SCAN_ROWS) -> Tuple[int, Dict[str, int]]:
+        """detect_header_row(), raising ValueError naming the missing columns if there is no header row."""
+        row_index, columns = self.detect_header_row(rows, scan_rows)
+        if row_index is None:
+            raise ValueError(f"Missing required Excel columns: {self.missing(columns)}")
+        return row_index, columns
+
+
+def _load_profiles() -> Dict[str, dict]:
+    profiles = {"default": DEFAULT_PROFILE}
+    if COLUMN_MAPPINGS_FILE:
+        try:
+            with open(COLUMN_MAPPINGS_FILE, encoding="utf-8") as f:
+                loaded = json.load(f).get("profiles", {})
+        except (OSError, ValueError, AttributeError) as e:
+            logger.error(f"Could not load column mappings from {COLUMN_MAPPINGS_FILE}: {str(e)}")
+            return profiles
+        # Compile each profile now so a bad one is reported at startup and
+        # skipped, rather than failing every request that selects it
+        for name, profile in loaded.items():
+            try:
+                ColumnMatcher(name, profile)
+            except (ValueError, AttributeError, TypeError) as e:
+                logger.error(f"Skipping column profile '{name}' from {COLUMN_MAPPINGS_FILE}: {str(e)}")
+                continue
+            profiles[name] = profile
+    return profiles
+
+
+PROFILES = _load_profiles()
+_matchers: Dict[str, ColumnMatcher] = {}
+
+
+def get_matcher(profile: Optional[str] = None) -> ColumnMatcher:
+    """The compiled matcher for a profile name (default: COLUMN_PROFILE)."""
+    name = profile or DEFAULT_COLUMN_PROFILE
+    matcher = _matchers.get(name)
+    if matcher is None:
+        if name not in PROFILES:
+            raise ValueError(f"Unknown column profile '{name}'; available: {sorted(PROFILES)}")
+        matcher = _matchers[name] = ColumnMatcher(name, PROFILES[name])
+    return matcher
@@ -1,12 +1,22 @@
 """
-Database connection and user management module for SQL Server.
+Database connection and user management module.
+
+User storage sits behind a small repository interface. Two backends ship:
+SQL Server via pyodbc (the production default) and an embedded SQLite file,
+which needs no server and is meant for local development, CI benchmarks and
+single-node deployments. Select one with DB_BACKEND=sqlserver|sqlite.
 """
-import pyodbc
+import abc
 import logging
+import sqlite3
+import threading
 from typing import Optional, Dict
 import os
 from dotenv import load_dotenv
 
+from migrations import run_migrations
+from user_cache import user_cache
+
 load_dotenv()
 
 logger = logging.getLogger("brd-utility")
@@ -14,6 +24,16 @@ logger = logging.getLogger("brd-utility")
 # Database configuration - can be set via environment variables
 import platform
 
+DB_BACKEND = os.getenv("DB_BACKEND", "sqlserver").strip().lower()
+
+# Startup schema handling: migrate (apply pending migrations), check (version
+# check only) or skip (no database work at all, for workers that never serve auth)
+DB_INIT_MODE = os.getenv("DB_INIT_MODE", "migrate").strip().lower()
+
+# SQLite configuration (used when DB_BACKEND=sqlite)
+SQLITE_PATH = os.getenv("SQLITE_PATH", "brd_users.db")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
 DB_SERVER = os.getenv("DB_SERVER", "localhost")
 DB_DATABASE = os.getenv("DB_DATABASE", "IQVIA_DocuFlow")
 DB_USERNAME = os.getenv("DB_USERNAME", "")
@@ -35,13 +55,29 @@ USE_WINDOWS_AUTH = not DB_USERNAME or not DB_PASSWORD
 if platform.system() == "Linux" and USE_WINDOWS_AUTH:
     # Force SQL Server Authentication on Linux
     USE_WINDOWS_AUTH = False
-    logger.warning("Windows Authentication not supported on Linux. Using SQL Server Authentication.")
+    if DB_BACKEND == "sqlserver":
+        logger.warning("Windows Authentication not supported on Linux. Using SQL Server Authentication.")
+
+USER_COLUMNS = "id, username, email, password_hash, full_name, created_at, updated_at"
+
+
+def _row_to_user(row) -> Dict:
+    """Map a users row (selected with USER_COLUMNS) to a dict."""
+    return {
+        "id": row[0],
+        "username": row[1],
+        "email": row[2],
+        "password_hash": row[3],
+        "full_name": row[4],
+        "created_at": row[5],
+        "updated_at": row[6]
+    }
 
 
 def get_connection_string() -> str:
     """Generate connection string for SQL Server."""
     import platform
-    
+
     if USE_WINDOWS_AUTH and platform.system() != "Linux":
         # Windows Authentication (only on Windows)
         conn_str = (
@@ -76,7 +112,8 @@ def get_connection_string() -> str:
 
 
 def get_db_connection():
-    """Get a database connection."""
+    """Get a SQL Server database connection."""
+    import pyodbc  # imported lazily so the SQLite backend works without ODBC libraries
     try:
         conn_str = get_connection_string()
         conn = pyodbc.connect(conn_str)
@@ -86,179 +123,388 @@ def get_db_connection():
         raise
 
 
-def init_database():
-    """Initialize database and create users table if it doesn't exist."""
-    try:
+# ------------------------------------------------------------------------------
+# Repository interface
+# ------------------------------------------------------------------------------
+class UserRepository(abc.ABC):
+    """Storage interface for user accounts. Backends implement every method."""
+
+    name = "base"
+
+    @abc.abstractmethod
+    def get_schema_version(self) -> int:
+        """Highest applied migration version (0 if none have been applied)."""
+
+    @abc.abstractmethod
+    def apply_migration(self, migration) -> bool:
+        """
+        Run one migration and record it in schema_version, in one transaction.
+        Returns False if another instance recorded the same version first.
+        """
+
+    @abc.abstractmethod
+    def create_user(self, username: str, email: str, password_hash: str, full_name: Optional[str] = None) -> bool:
+        """Insert a user. Returns False on a duplicate username or email."""
+
+    @abc.abstractmethod
+    def get_user_by_username(self, username: str) -> Optional[Dict]:
+        """The user row as a dict, or None if there is no such username."""
+
+    @abc.abstractmethod
+    def get_user_by_email(self, email: str) -> Optional[Dict]:
+        """The user row as a dict, or None if there is no such email."""
+
+
+# ------------------------------------------------------------------------------
+# SQL Server backend
+# ------------------------------------------------------------------------------
+def _object_already_exists(error) -> bool:
+    """A pyodbc error for SQL Server's "There is already an object named ..." (error 2714, SQLSTATE 42S01)."""
+    return any("42S01" in str(arg) or "(2714)" in str(arg) for arg in error.args)
+
+
+class SqlServerUserRepository(UserRepository):
+    """Users stored in SQL Server through pyodbc."""
+
+    name = "sqlserver"
+
+    def _connect_or_create_database(self):
+        """Connect to the target database, creating it through master if it is missing."""
+        import pyodbc
         # First, try to connect to the target database
         try:
-            conn = get_db_connection()
+            return get_db_connection()
         except Exception as db_error:
             # If database doesn't exist, try to create it by connecting to master
             error_msg = str(db_error).lower()
-            if "cannot open database" in error_msg or "4060" in error_msg:
-                logger.warning(f"Database '{DB_DATABASE}' does not exist. Attempting to create it...")
-                try:
-                    # Connect to master database to create the target database
-                    if USE_WINDOWS_AUTH:
-                        master_conn_str = (
-                            f"DRIVER={{{DB_DRIVER}}};"
-                            f"SERVER={DB_SERVER};"
-                            f"DATABASE=master;"
-                            f"Trusted_Connection=yes;"
-                        )
-                    else:
-                        master_conn_str = (
-                            f"DRIVER={{{DB_DRIVER}}};"
-                            f"SERVER={DB_SERVER};"
-                            f"DATABASE=master;"
-                            f"UID={DB_USERNAME};"
-                            f"PWD={DB_PASSWORD};"
-                        )
-                    
-                    master_conn = pyodbc.connect(master_conn_str, autocommit=True)
-                    master_cursor = master_conn.cursor()
-                    
-                    # Create database if it doesn't exist
-                    create_db_sql = f"""
-                    IF NOT EXISTS (SELECT name FROM sys.databases WHERE name = N'{DB_DATABASE}')
-                    BEGIN
-                        CREATE DATABASE [{DB_DATABASE}]
-                    END
-                    """
-                    master_cursor.execute(create_db_sql)
-                    master_cursor.close()
-                    master_conn.close()
-                    
-                    logger.info(f"Database '{DB_DATABASE}' created successfully.")
-                    
-                    # Now try to connect to the newly created database
-                    conn = get_db_connection()
-                except Exception as create_error:
-                    logger.error(f"Failed to create database: {str(create_error)}")
-                    logger.error("Please create the database manually using SQL Server Management Studio:")
-                    logger.error(f"  CREATE DATABASE [{DB_DATABASE}]")
-                    raise Exception(f"Cannot create database '{DB_DATABASE}'. Please create it manually or check SQL Server permissions. Error: {str(create_error)}")
-            else:
+            if "cannot open database" not in error_msg and "4060" not in error_msg:
                 # Re-raise if it's a different error
                 raise
-        
+
+        logger.warning(f"Database '{DB_DATABASE}' does not exist. Attempting to create it...")
+        try:
+            # Connect to master database to create the target database
+            if USE_WINDOWS_AUTH:
+                master_conn_str = (
+                    f"DRIVER={{{DB_DRIVER}}};"
+                    f"SERVER={DB_SERVER};"
+                    f"DATABASE=master;"
+                    f"Trusted_Connection=yes;"
+                )
+            else:
+                master_conn_str = (
+                    f"DRIVER={{{DB_DRIVER}}};"
+                    f"SERVER={DB_SERVER};"
+                    f"DATABASE=master;"
+                    f"UID={DB_USERNAME};"
+                    f"PWD={DB_PASSWORD};"
+                )
+
+            master_conn = pyodbc.connect(master_conn_str, autocommit=True)
+            master_cursor = master_conn.cursor()
+
+            # Create database if it doesn't exist
+            create_db_sql = f"""
+            IF NOT EXISTS (SELECT name FROM sys.databases WHERE name = N'{DB_DATABASE}')
+            BEGIN
+                CREATE DATABASE [{DB_DATABASE}]
+            END
+            """
+            master_cursor.execute(create_db_sql)
+            master_cursor.close()
+            master_conn.close()
+
+            logger.info(f"Database '{DB_DATABASE}' created successfully.")
+
+            # Now try to connect to the newly created database
+            return get_db_connection()
+        except Exception as create_error:
+            logger.error(f"Failed to create database: {str(create_error)}")
+            logger.error("Please create the database manually using SQL Server Management Studio:")
+            logger.error(f"  CREATE DATABASE [{DB_DATABASE}]")
+            raise Exception(f"Cannot create database '{DB_DATABASE}'. Please create it manually or check SQL Server permissions. Error: {str(create_error)}")
+
+    def get_schema_version(self) -> int:
+        import pyodbc
+        conn = self._connect_or_create_database()
         cursor = conn.cursor()
-        
-        # Create users table
-        create_table_sql = """
-        IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[users]') AND type in (N'U'))
-        BEGIN
-            CREATE TABLE [dbo].[users] (
-                [id] INT IDENTITY(1,1) PRIMARY KEY,
-                [username] NVARCHAR(100) NOT NULL UNIQUE,
-                [email] NVARCHAR(255) NOT NULL UNIQUE,
-                [password_hash] NVARCHAR(255) NOT NULL,
-                [full_name] NVARCHAR(255),
-                [created_at] DATETIME2 DEFAULT GETDATE(),
-                [updated_at] DATETIME2 DEFAULT GETDATE()
-            );
-            CREATE INDEX IX_users_username ON [dbo].[users]([username]);
-            CREATE INDEX IX_users_email ON [dbo].[users]([email]);
-        END
-        """
-        
-        cursor.execute(create_table_sql)
-        conn.commit()
-        logger.info("Database initialized successfully. Users table created/verified.")
-        cursor.close()
-        conn.close()
-    except Exception as e:
-        logger.error(f"Database initialization error: {str(e)}")
-        raise
+        try:
+            cursor.execute("SELECT MAX(version) FROM [dbo].[schema_version]")
+            row = cursor.fetchone()
+            return row[0] or 0
+        except pyodbc.ProgrammingError:
+            # schema_version does not exist yet: nothing has been applied
+            return 0
+        finally:
+            cursor.close()
+            conn.close()
 
+    def _ensure_schema_version_table(self, conn, cursor) -> None:
+        import pyodbc
+        try:
+            cursor.execute("""
+            IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[schema_version]') AND type in (N'U'))
+            BEGIN
+                CREATE TABLE [dbo].[schema_version] (
+                    [version] INT PRIMARY KEY,
+                    [description] NVARCHAR(255) NOT NULL,
+                    [applied_at] DATETIME2 DEFAULT GETDATE()
+                );
+            END
+            """)
+            conn.commit()
+        except pyodbc.ProgrammingError as e:
+            # Another instance created it between our existence check and the CREATE
+            conn.rollback()
+            if not _object_already_exists(e):
+                raise
 
-def create_user(username: str, email: str, password_hash: str, full_name: Optional[str] = None) -> bool:
-    """Create a new user in the database."""
-    try:
+    def apply_migration(self, migration) -> bool:
+        import pyodbc
         conn = get_db_connection()
         cursor = conn.cursor()
-        
-        insert_sql = """
-        INSERT INTO [dbo].[users] (username, email, password_hash, full_name)
-        VALUES (?, ?, ?, ?)
-        """
-        
-        cursor.execute(insert_sql, (username, email, password_hash, full_name))
-        conn.commit()
-        cursor.close()
-        conn.close()
-        logger.info(f"User '{username}' created successfully.")
-        return True
-    except pyodbc.IntegrityError as e:
-        logger.warning(f"User creation failed - duplicate username or email: {str(e)}")
-        return False
-    except Exception as e:
-        logger.error(f"Error creating user: {str(e)}")
-        raise
+        try:
+            self._ensure_schema_version_table(conn, cursor)
+            cursor.execute(migration.sql[self.name])
+            cursor.execute(
+                "INSERT INTO [dbo].[schema_version] (version, description) VALUES (?, ?)",
+                (migration.version, migration.description),
+            )
+            conn.commit()
+            return True
+        except pyodbc.IntegrityError:
+            conn.rollback()
+            return False
+        except pyodbc.ProgrammingError as e:
+            conn.rollback()
+            # Two instances passed the migration's IF NOT EXISTS check at once and
+            # this one lost the CREATE; the winner committed (its DDL held the
+            # lock we waited on), so the version is recorded if that is the case
+            if _object_already_exists(e):
+                cursor.execute("SELECT 1 FROM [dbo].[schema_version] WHERE version = ?", (migration.version,))
+                if cursor.fetchone() is not None:
+                    return False
+            raise
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
 
+    def create_user(self, username: str, email: str, password_hash: str, full_name: Optional[str] = None) -> bool:
+        import pyodbc
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
 
-def get_user_by_username(username: str) -> Optional[Dict]:
-    """Get user by username."""
-    try:
+            insert_sql = """
+            INSERT INTO [dbo].[users] (username, email, password_hash, full_name)
+            VALUES (?, ?, ?, ?)
+            """
+
+            cursor.execute(insert_sql, (username, email, password_hash, full_name))
+            conn.commit()
+            cursor.close()
+            conn.close()
+            logger.info(f"User '{username}' created successfully.")
+            return True
+        except pyodbc.IntegrityError as e:
+            logger.warning(f"User creation failed - duplicate username or email: {str(e)}")
+            return False
+        except Exception as e:
+            logger.error(f"Error creating user: {str(e)}")
+            raise
+
+    def _get_user(self, column: str, value: str) -> Optional[Dict]:
         conn = get_db_connection()
         cursor = conn.cursor()
-        
-        select_sql = """
-        SELECT id, username, email, password_hash, full_name, created_at, updated_at
+
+        select_sql = f"""
+        SELECT {USER_COLUMNS}
         FROM [dbo].[users]
-        WHERE username = ?
+        WHERE {column} = ?
         """
-        
-        cursor.execute(select_sql, (username,))
+
+        cursor.execute(select_sql, (value,))
         row = cursor.fetchone()
         cursor.close()
         conn.close()
-        
-        if row:
-            return {
-                "id": row[0],
-                "username": row[1],
-                "email": row[2],
-                "password_hash": row[3],
-                "full_name": row[4],
-                "created_at": row[5],
-                "updated_at": row[6]
-            }
-        return None
-    except Exception as e:
-        logger.error(f"Error getting user: {str(e)}")
-        raise
+        return _row_to_user(row) if row else None
 
+    def get_user_by_username(self, username: str) -> Optional[Dict]:
+        try:
+            return self._get_user("username", username)
+        except Exception as e:
+            logger.error(f"Error getting user: {str(e)}")
+            raise
 
-def get_user_by_email(email: str) -> Optional[Dict]:
-    """Get user by email."""
+    def get_user_by_email(self, email: str) -> Optional[Dict]:
+        try:
+            return self._get_user("email", email)
+        except Exception as e:
+            logger.error(f"Error getting user by email: {str(e)}")
+            raise
+
+
+# ------------------------------------------------------------------------------
+# SQLite backend
+# ------------------------------------------------------------------------------
+class SqliteUserRepository(UserRepository):
+    """
+    Users stored in a local SQLite file in WAL mode.
+
+    Mirrors the SQL Server schema, including case-insensitive uniqueness on
+    username and email (SQL Server's default collation) via COLLATE NOCASE.
+    Each thread keeps one open connection, so lookups skip connection setup.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+        return conn
+
+    def get_schema_version(self) -> int:
+        try:
+            row = self._connect().execute("SELECT MAX(version) FROM schema_version").fetchone()
+        except sqlite3.OperationalError:
+            # schema_version does not exist yet: nothing has been applied
+            return 0
+        return row[0] or 0
+
+    def apply_migration(self, migration) -> bool:
+        conn = self._connect()
+        description = migration.description.replace("'", "''")
+        try:
+            conn.executescript(f"""
+            BEGIN;
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+            );
+            {migration.sql[self.name]}
+            INSERT INTO schema_version (version, description) VALUES ({int(migration.version)}, '{description}');
+            COMMIT;
+            """)
+            return True
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            return False
+        except Exception:
+            # executescript leaves the script's BEGIN open when a statement
+            # fails; without this the next "with conn:" commits half the DDL
+            conn.rollback()
+            raise
+
+    def create_user(self, username: str, email: str, password_hash: str, full_name: Optional[str] = None) -> bool:
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT INTO users (username, email, password_hash, full_name) VALUES (?, ?, ?, ?)",
+                    (username, email, password_hash, full_name),
+                )
+            logger.info(f"User '{username}' created successfully.")
+            return True
+        except sqlite3.IntegrityError as e:
+            logger.warning(f"User creation failed - duplicate username or email: {str(e)}")
+            return False
+        except Exception as e:
+            logger.error(f"Error creating user: {str(e)}")
+            raise
+
+    def _get_user(self, column: str, value: str) -> Optional[Dict]:
+        row = self._connect().execute(
+            f"SELECT {USER_COLUMNS} FROM users WHERE {column} = ?", (value,)
+        ).fetchone()
+        return _row_to_user(row) if row else None
+
+    def get_user_by_username(self, username: str) -> Optional[Dict]:
+        try:
+            return self._get_user("username", username)
+        except Exception as e:
+            logger.error(f"Error getting user: {str(e)}")
+            raise
+
+    def get_user_by_email(self, email: str) -> Optional[Dict]:
+        try:
+            return self._get_user("email", email)
+        except Exception as e:
+            logger.error(f"Error getting user by email: {str(e)}")
+            raise
+
+
+# ------------------------------------------------------------------------------
+# Backend selection
+# ------------------------------------------------------------------------------
+USER_REPOSITORIES = {
+    "sqlserver": SqlServerUserRepository,
+    "sqlite": SqliteUserRepository,
+}
+
+_repository: Optional[UserRepository] = None
+
+
+def get_user_repository() -> UserRepository:
+    """Return the configured user repository (created on first use)."""
+    global _repository
+    if _repository is None:
+        if DB_BACKEND not in USER_REPOSITORIES:
+            raise ValueError(
+                f"Unknown DB_BACKEND '{DB_BACKEND}'. Expected one of: {sorted(USER_REPOSITORIES)}"
+            )
+        _repository = USER_REPOSITORIES[DB_BACKEND]()
+        logger.info(f"Using '{_repository.name}' user storage backend")
+    return _repository
+
+
+def set_user_repository(repository: Optional[UserRepository]) -> None:
+    """Replace the active repository (None resets to the DB_BACKEND default)."""
+    global _repository
+    _repository = repository
+    user_cache.clear()
+
+
+def init_database():
+    """
+    Check the schema version and, with DB_INIT_MODE=migrate (the default),
+    apply pending migrations. DB_INIT_MODE=check only reports pending ones.
+    """
+    if DB_INIT_MODE not in ("migrate", "check"):
+        raise ValueError(f"Unknown DB_INIT_MODE '{DB_INIT_MODE}'. Expected one of: migrate, check, skip")
+    run_migrations(get_user_repository(), apply=DB_INIT_MODE == "migrate")
+
+
+def create_user(username: str, email: str, password_hash: str, full_name: Optional[str] = None) -> bool:
+    """Create a new user in the database."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        select_sql = """
-        SELECT id, username, email, password_hash, full_name, created_at, updated_at
-        FROM [dbo].[users]
-        WHERE email = ?
-        """
-        
-        cursor.execute(select_sql, (email,))
-        row = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
-        if row:
-            return {
-                "id": row[0],
-                "username": row[1],
-                "email": row[2],
-                "password_hash": row[3],
-                "full_name": row[4],
-                "created_at": row[5],
-                "updated_at": row[6]
-            }
-        return None
-    except Exception as e:
-        logger.error(f"Error getting user by email: {str(e)}")
-        raise
+        return get_user_repository().create_user(username, email, password_hash, full_name)
+    finally:
+        invalidate_user(username)
+
 
+def invalidate_user(username: str) -> None:
+    """Drop a user from the lookup cache. Call after any write to that user's row."""
+    user_cache.invalidate(username)
+
+
+def get_user_by_username(username: str) -> Optional[Dict]:
+    """Get user by username (served from the read-through user cache)."""
+    return user_cache.get(username, get_user_repository().get_user_by_username)
+
+
+def get_user_by_email(email: str) -> Optional[Dict]:
+    """Get user by email."""
+    return get_user_repository().get_user_by_email(email)
@@ -0,0 +1,855 @@
+"""
+Word rendering: fill the Functional Requirements table of the BRD template.
+
+Kept out of main.py so python-docx/lxml are only imported when a document is
+actually rendered.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import zipfile
+from io import BytesIO
+from typing import List, NamedTuple, Optional
+
+from docx import Document # type: ignore
+from docx.shared import Pt, RGBColor # type: ignore
+from docx.enum.text import WD_ALIGN_PARAGRAPH # type: ignore
+from docx.oxml import OxmlElement # type: ignore
+from docx.oxml.ns import qn # type: ignore
+from docx.opc.constants import RELATIONSHIP_TYPE as RT # type: ignore
+from docx.opc.packuri import PackURI # type: ignore
+from docx.opc.part import Part # type: ignore
+from docx.opc.pkgwriter import PackageWriter # type: ignore
+from docx.table import _Cell # type: ignore
+
+from metrics import NULL_TIMER
+
+logger = logging.getLogger("brd-utility")
+
+SERVER_TEMPLATE_PATH = "templates/template.docx"
+
+# Output zip compression: "store" | "fast" | "default" | "best"
+DOCX_COMPRESSION = os.getenv("DOCX_COMPRESSION", "default").lower()
+
+_template_cache = {}
+_template_cache_lock = threading.Lock()
+
+
+def load_server_template(path: str = SERVER_TEMPLATE_PATH) -> bytes:
+    """
+    Return the server-side template bytes, read from disk only when the file
+    has changed (keyed by mtime and size) since the last call.
+    """
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _template_cache_lock:
+        cached = _template_cache.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+    with open(path, "rb") as f:
+        template_bytes = f.read()
+    with _template_cache_lock:
+        _template_cache[path] = (key, template_bytes)
+    return template_bytes
+
+# ------------------------------------------------------------------------------
+# Saving
+# ------------------------------------------------------------------------------
+# python-docx always deflates every part at zlib's default level. For BRDs
+# with multi-MB document.xml bodies that is a visible share of render time,
+# so save_docx() writes the package itself under a compression policy:
+# "store" (no compression, fastest, largest), "fast" (level 1), "default"
+# (level 6, what doc.save() produces) or "best" (level 9). Media that is
+# already compressed is stored as-is under every policy.
+COMPRESSION_POLICIES = {
+    "store": (zipfile.ZIP_STORED, None),
+    "fast": (zipfile.ZIP_DEFLATED, 1),
+    "default": (zipfile.ZIP_DEFLATED, 6),
+    "best": (zipfile.ZIP_DEFLATED, 9),
+}
+PRECOMPRESSED_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".wdp", ".mp3", ".mp4", ".zip")
+
+
+def compression_policy(name: Optional[str]) -> str:
+    """Validated policy name; None means DOCX_COMPRESSION."""
+    policy = (name or DOCX_COMPRESSION).lower()
+    if policy not in COMPRESSION_POLICIES:
+        raise ValueError(f"compression must be one of {list(COMPRESSION_POLICIES)}")
+    return policy
+
+
+class _PolicyZipWriter:
+    """python-docx physical package writer with per-part compression."""
+
+    def __init__(self, pkg_file, policy: str):
+        self._compress_type, self._level = COMPRESSION_POLICIES[policy]
+        self._zipf = zipfile.ZipFile(pkg_file, "w", compression=self._compress_type)
+
+    def write(self, pack_uri, blob):
+        self.write_member(pack_uri.membername, blob)
+
+    def write_member(self, name: str, blob: bytes):
+        if name.lower().endswith(PRECOMPRESSED_EXTENSIONS):
+            self._zipf.writestr(name, blob, compress_type=zipfile.ZIP_STORED)
+        else:
+            self._zipf.writestr(name, blob, compress_type=self._compress_type, compresslevel=self._level)
+
+    def close(self):
+        self._zipf.close()
+
+
+# save_docx() drives these private PackageWriter steps itself; python-docx is
+# pinned in requirements.txt, and if an upgrade drops them saving falls back
+# to doc.save() followed by a recompress
+_PACKAGE_WRITER_STEPS = ("_write_content_types_stream", "_write_pkg_rels", "_write_parts")
+_DIRECT_PACKAGE_WRITE = all(hasattr(PackageWriter, step) for step in _PACKAGE_WRITER_STEPS)
+if not _DIRECT_PACKAGE_WRITE:
+    logger.warning("python-docx PackageWriter internals not found; docx compression will recompress doc.save() output")
+
+
+def _write_package(package, policy: str) -> BytesIO:
+    # Mirrors OpcPackage.save() / PackageWriter.write() with our zip writer
+    for part in package.parts:
+        part.before_marshal()
+    out = BytesIO()
+    writer = _PolicyZipWriter(out, policy)
+    PackageWriter._write_content_types_stream(writer, package.parts)
+    PackageWriter._write_pkg_rels(writer, package.rels)
+    PackageWriter._write_parts(writer, package.parts)
+    writer.close()
+    return out
+
+
+def _recompress(saved: BytesIO, policy: str) -> BytesIO:
+    """Rewrite a doc.save() stream under a compression policy, member by member."""
+    out = BytesIO()
+    writer = _PolicyZipWriter(out, policy)
+    with zipfile.ZipFile(saved) as source:
+        for info in source.infolist():
+            writer.write_member(info.filename, source.read(info))
+    writer.close()
+    return out
+
+
+def save_docx(doc, compression: Optional[str] = None) -> BytesIO:
+    """Save doc to a new stream under a compression policy (see COMPRESSION_POLICIES)."""
+    policy = compression_policy(compression)
+    out = None
+    if _DIRECT_PACKAGE_WRITE:
+        try:
+            out = _write_package(doc.part.package, policy)
+        except (AttributeError, TypeError):
+            logger.exception("Direct docx package write failed; falling back to doc.save()")
+    if out is None:
+        out = BytesIO()
+        doc.save(out)
+        out.seek(0)
+        if policy != "default":  # doc.save() output already is the default policy
+            out = _recompress(out, policy)
+    out.seek(0)
+    return out
+
+
+# ------------------------------------------------------------------------------
+# Word rendering - Programmatic approach matching brd_updater.py logic
+# ------------------------------------------------------------------------------
+
+# Color constants matching brd_updater.py
+TABLE_HEADER_COLOR = (0, 176, 240)  # RGB: Blue
+FORM_HEADER_COLOR = (0, 176, 240)   # RGB: Blue
+
+# Requirement fields written to the Functional Requirements table's columns
+ROW_FIELDS = ("req_id", "section", "description", "status")
+
+def _set_cell_background(cell, color: tuple):
+    """Set cell background color - matching brd_updater.py logic"""
+    cell_properties = cell._element.get_or_add_tcPr()
+    # Replace any existing shading instead of stacking another w:shd
+    for existing in cell_properties.findall(qn('w:shd')):
+        cell_properties.remove(existing)
+    shading = OxmlElement('w:shd')
+    # Convert RGB to hex (e.g., (0, 176, 240) → '00B0F0')
+    hex_color = '{:02X}{:02X}{:02X}'.format(color[0], color[1], color[2])
+    shading.set(qn('w:fill'), hex_color)
+    # w:shd has a fixed place in the w:tcPr child sequence
+    cell_properties.insert_element_before(
+        shading, 'w:noWrap', 'w:tcMar', 'w:textDirection', 'w:tcFitText', 'w:vAlign', 'w:hideMark',
+        'w:headers', 'w:cellIns', 'w:cellDel', 'w:cellMerge', 'w:tcPrChange',
+    )
+
+def _format_header_row(table):
+    """Format table header row - matching brd_updater.py format_header_row()"""
+    header_row = table.rows[0]  # First row
+    for cell in header_row.cells:
+        # Background color: Blue (RGB: 0, 176, 240)
+        _set_cell_background(cell, TABLE_HEADER_COLOR)
+        
+        # Text formatting
+        for paragraph in cell.paragraphs:
+            paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            for run in paragraph.runs:
+                run.font.bold = True
+                run.font.size = Pt(11)
+                run.font.color.rgb = RGBColor(255, 255, 255)  # White text
+
+def _add_form_header(table, form_name: str):
+    """Add form header row - matching brd_updater.py _add_form_header()"""
+    row = table.add_row()
+    merged_cell = row.cells[0]
+    
+    # Set text
+    merged_cell.text = form_name
+    
+    # Background color: Blue
+    _set_cell_background(merged_cell, FORM_HEADER_COLOR)
+    
+    # Text formatting
+    for paragraph in merged_cell.paragraphs:
+        paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        for run in paragraph.runs:
+            run.font.bold = True
+            run.font.size = Pt(11)
+            run.font.color.rgb = RGBColor(0, 0, 0)  # Black text
+    
+    # Cell merging (all columns merged into 1)
+    for cell in row.cells[1:]:
+        merged_cell.merge(cell)
+    return row
+
+def _add_requirement_row(table, req: dict, fields=ROW_FIELDS):
+    """Add requirement data row - matching brd_updater.py _add_requirement_row()"""
+    row = table.add_row()
+    
+    # Set cell values, one requirement field per column
+    for cell, field in zip(row.cells, fields):
+        cell.text = req.get(field, "")
+    
+    # Formatting
+    for cell in row.cells:
+        for paragraph in cell.paragraphs:
+            # Font size
+            for run in paragraph.runs:
+                run.font.size = Pt(10)
+            # Alignment
+            paragraph.alignment = WD_ALIGN_PARAGRAPH.LEFT
+            # No background color (default white)
+    return row
+
+def render_docx(template_bytes: bytes, requirements: list, timer=NULL_TIMER, compression: Optional[str] = None,
+                formatting: Optional[str] = None):
+    """
+    Programmatically build Word document matching brd_updater.py logic.
+    Requirements should be grouped structure: [{"form": "...", "requirements": [...]}, ...]
+    
+    IMPORTANT: This function ONLY updates the Functional Requirements table.
+    All other content (DOCUMENT INFORMATION, DOCUMENT HISTORY, etc.) is preserved.
+    """
+    # Load template document - this preserves ALL content including all tables
+    with timer.stage("template_load"):
+        doc = Document(BytesIO(template_bytes))
+    
+    logger.info(f"Loaded template with {len(doc.tables)} tables and {len(doc.paragraphs)} paragraphs")
+
+    with timer.stage("render_table"):
+        _fill_requirements_table(doc, requirements, formatting)
+        _store_fingerprint(doc, build_fingerprint(requirements))
+
+    # Save to BytesIO - this preserves ALL tables and content (see save_docx for compression)
+    with timer.stage("save"):
+        out = save_docx(doc, compression)
+    return out
+
+
+def _find_requirements_table(doc):
+    """The Functional Requirements table, or None if the document has none."""
+    # Look for table with 4 columns and headers: Requirement ID, Section, Description, Status
+    for table_idx, table in enumerate(doc.tables):
+        if len(table.rows) > 0 and len(table.columns) == 4:
+            headers = [cell.text.strip().lower() for cell in table.rows[0].cells]
+            # Check if this matches the Functional Requirements table structure
+            # Must have "requirement id" in first column and "section" in second
+            if (len(headers) >= 4 and 
+                'requirement id' in headers[0] and 
+                'section' in headers[1] and
+                'description' in headers[2] and
+                'status' in headers[3]):
+                logger.info(f"Found Functional Requirements table at index {table_idx} with headers: {headers}")
+                return table
+    return None
+
+
+def _fill_requirements_table(doc, requirements: list, formatting: Optional[str] = None):
+    """Locate (or create) the Functional Requirements table and fill it."""
+    # Find the Functional Requirements table specifically
+    target_table = _find_requirements_table(doc)
+    
+    if not target_table:
+        logger.warning("Functional Requirements table not found. Searching for insertion point...")
+        # Find where to insert (after "Functional Requirements" heading)
+        insert_pos = None
+        for i, para in enumerate(doc.paragraphs):
+            if 'functional requirements' in para.text.lower():
+                insert_pos = i + 1
+                break
+        
+        if insert_pos:
+            # Create table after the heading
+            target_table = doc.add_table(rows=1, cols=4)
+            # Set headers
+            headers = ['Requirement ID', 'Section', 'Description', 'Status']
+            for i, header in enumerate(headers):
+                target_table.rows[0].cells[i].text = header
+            logger.info("Created new Functional Requirements table")
+        else:
+            raise ValueError("Could not find 'Functional Requirements' section in template")
+    
+    total_reqs = _fill_table(target_table, requirements, formatting=formatting)
+    logger.info(f"Rendered Functional Requirements table with {len(target_table.rows)} rows ({total_reqs} requirements)")
+    logger.info(f"Document still has {len(doc.tables)} tables total (all other tables preserved)")
+
+
+# ------------------------------------------------------------------------------
+# Style-based formatting
+# ------------------------------------------------------------------------------
+# With DOCX_FORMATTING=styles (or formatting="styles" per call), form header
+# and requirement rows do not carry bold/size/color/alignment on every run
+# and paragraph. The BRD paragraph styles below are added to styles.xml once
+# per document, a prototype row of each kind is built once per table, and
+# every row is a copy of its prototype with only the text filled in.
+#
+# The table itself gets the "BRD Table" style: the template table's own
+# style (borders) plus a fixed layout, so column widths come from the
+# table's grid and rows carry no per-cell w:tcW, and the header look as a
+# first-row format. The header row still gets direct formatting too, since
+# it has to override whatever the template runs carry. Form header rows
+# keep their w:shd: table style conditional formats only address the first
+# and last rows and columns and row/column bands, not arbitrary rows.
+DOCX_FORMATTING = os.getenv("DOCX_FORMATTING", "direct").lower()
+FORMATTING_MODES = ("direct", "styles")
+
+# name -> (bold, size pt, RGB color or None, alignment)
+BRD_STYLES = {
+    "BRD Form Header": (True, 11, (0, 0, 0), WD_ALIGN_PARAGRAPH.CENTER),
+    "BRD Requirement": (None, 10, None, WD_ALIGN_PARAGRAPH.LEFT),
+}
+
+
+def formatting_mode(name: Optional[str]) -> str:
+    """Validated formatting mode; None means DOCX_FORMATTING."""
+    mode = (name or DOCX_FORMATTING).lower()
+    if mode not in FORMATTING_MODES:
+        raise ValueError(f"formatting must be one of {list(FORMATTING_MODES)}")
+    return mode
+
+
+BRD_TABLE_STYLE = "BRD Table"
+
+
+def _ensure_brd_table_style(doc, base_style):
+    """The BRD_TABLE_STYLE table style, added based on base_style if missing."""
+    from docx.enum.style import WD_STYLE_TYPE  # type: ignore
+
+    styles = doc.styles
+    if BRD_TABLE_STYLE in styles:
+        return styles[BRD_TABLE_STYLE]
+    style = styles.add_style(BRD_TABLE_STYLE, WD_STYLE_TYPE.TABLE)
+    if base_style is not None and base_style.name != BRD_TABLE_STYLE:
+        style.base_style = base_style
+
+    # Fixed layout: column widths are the table grid's, not per-cell tcW
+    tbl_pr = OxmlElement('w:tblPr')
+    layout = OxmlElement('w:tblLayout')
+    layout.set(qn('w:type'), 'fixed')
+    tbl_pr.append(layout)
+    style.element.append(tbl_pr)
+
+    # Header row look, matching _format_header_row()
+    first_row = OxmlElement('w:tblStylePr')
+    first_row.set(qn('w:type'), 'firstRow')
+    p_pr = OxmlElement('w:pPr')
+    jc = OxmlElement('w:jc')
+    jc.set(qn('w:val'), 'center')
+    p_pr.append(jc)
+    r_pr = OxmlElement('w:rPr')
+    r_pr.append(OxmlElement('w:b'))
+    color = OxmlElement('w:color')
+    color.set(qn('w:val'), 'FFFFFF')
+    size = OxmlElement('w:sz')
+    size.set(qn('w:val'), '22')
+    r_pr.extend([color, size])
+    tc_pr = OxmlElement('w:tcPr')
+    shading = OxmlElement('w:shd')
+    shading.set(qn('w:val'), 'clear')
+    shading.set(qn('w:fill'), '{:02X}{:02X}{:02X}'.format(*TABLE_HEADER_COLOR))
+    tc_pr.append(shading)
+    first_row.extend([p_pr, r_pr, tc_pr])
+    style.element.append(first_row)
+    return style
+
+
+def _ensure_brd_styles(doc) -> dict:
+    """Add any missing BRD_STYLES to the document; returns name -> style id."""
+    from docx.enum.style import WD_STYLE_TYPE  # type: ignore
+
+    styles = doc.styles
+    ids = {}
+    for name, (bold, size, color, alignment) in BRD_STYLES.items():
+        if name in styles:
+            ids[name] = styles[name].style_id
+            continue
+        style = styles.add_style(name, WD_STYLE_TYPE.PARAGRAPH)
+        style.base_style = styles["Normal"]
+        style.font.bold = bold
+        style.font.size = Pt(size)
+        if color is not None:
+            style.font.color.rgb = RGBColor(*color)
+        style.paragraph_format.alignment = alignment
+        ids[name] = style.style_id
+    return ids
+
+
+_T_TAG = qn('w:t')
+
+
+class _StyledRows:
+    """Appends style-formatted rows to a table by copying prototype rows."""
+
+    def __init__(self, table, fields=ROW_FIELDS):
+        from copy import deepcopy
+
+        self._copy = deepcopy
+        self._tbl = table._tbl
+        self.fields = fields
+        document = table.part.document
+        style_ids = _ensure_brd_styles(document)
+        table.style = _ensure_brd_table_style(document, table.style)
+
+        self._requirement = self._prototype(table, style_ids["BRD Requirement"])
+        form_row = table.add_row()
+        _set_cell_background(form_row.cells[0], FORM_HEADER_COLOR)
+        for cell in form_row.cells[1:]:
+            form_row.cells[0].merge(cell)
+        self._form = self._prototype(table, style_ids["BRD Form Header"], form_row)
+
+    def _prototype(self, table, style_id: str, row=None):
+        tr = (row or table.add_row())._tr
+        self._tbl.remove(tr)
+        for tc in tr.tc_lst:
+            # Widths come from the table grid (fixed layout in BRD_TABLE_STYLE)
+            # (add_row() only writes a tcPr when the grid column has a width)
+            tc_pr = tc.tcPr
+            if tc_pr is not None:
+                for width in tc_pr.findall(qn('w:tcW')):
+                    tc_pr.remove(width)
+                if not len(tc_pr):
+                    tc.remove(tc_pr)
+            p = tc.p_lst[0]
+            p.style = style_id
+            t = p.add_r().add_t("")
+            t.set(qn('xml:space'), 'preserve')
+        return tr
+
+    def _append(self, prototype, values):
+        tr = self._copy(prototype)
+        # One w:t per cell, in cell order; filling it directly skips the run
+        # text setter, which clears the run and appends character by character
+        for t, value in zip(tr.iter(_T_TAG), values):
+            if "\n" in value or "\t" in value or "\r" in value:
+                t.getparent().text = value  # becomes w:br / w:tab elements
+            else:
+                t.text = value
+        self._tbl.append(tr)
+        return tr
+
+    def add_form_header(self, form_name: str):
+        return self._append(self._form, (form_name,))
+
+    def add_requirement(self, req: dict):
+        return self._append(self._requirement, [req.get(field, "") for field in self.fields])
+
+
+class _DirectRows:
+    """The same interface over the direct-formatting row helpers."""
+
+    def __init__(self, table, fields=ROW_FIELDS):
+        self._table = table
+        self.fields = fields
+
+    def add_form_header(self, form_name: str):
+        return _add_form_header(self._table, form_name)._tr
+
+    def add_requirement(self, req: dict):
+        return _add_requirement_row(self._table, req, self.fields)._tr
+
+
+def _row_writer(table, fields=ROW_FIELDS, formatting: Optional[str] = None):
+    if formatting_mode(formatting) == "styles":
+        return _StyledRows(table, fields)
+    return _DirectRows(table, fields)
+
+
+def _fill_table(target_table, requirements: list, fields=ROW_FIELDS, form_headers: bool = True,
+                formatting: Optional[str] = None) -> int:
+    """
+    Replace the data rows of target_table with a form header row per group
+    and a row per requirement; returns the number of requirements written.
+    Without form_headers, every requirement is written with no header rows.
+    """
+    # Clear existing data rows (keep header row only)
+    # Remove rows from end to beginning to avoid index issues
+    initial_row_count = len(target_table.rows)
+    for i in range(len(target_table.rows) - 1, 0, -1):
+        target_table._element.remove(target_table.rows[i]._element)
+    if initial_row_count > 1:
+        logger.info(f"Cleared {initial_row_count - 1} existing data rows")
+    
+    # Format header row
+    _format_header_row(target_table)
+    
+    rows = _row_writer(target_table, fields, formatting)
+    total_reqs = 0
+    if not form_headers:
+        for group in requirements:
+            for req in group.get("requirements", []):
+                rows.add_requirement(req)
+                total_reqs += 1
+        return total_reqs
+
+    # Process requirements grouped by Form
+    for group in requirements:
+        if isinstance(group, dict) and "requirements" in group:
+            form_name = group.get("form", "")
+            form_reqs = group.get("requirements", [])
+            
+            if form_name and form_reqs:
+                # Add form header (merged row)
+                rows.add_form_header(form_name)
+                
+                # Add requirement rows
+                for req in form_reqs:
+                    rows.add_requirement(req)
+                    total_reqs += 1
+    return total_reqs
+
+
+# ------------------------------------------------------------------------------
+# Multiple bound tables
+# ------------------------------------------------------------------------------
+def _header_signature(table) -> Optional[List[str]]:
+    """Lowercased header cell texts, or None for tables without rows."""
+    rows = table._tbl.tr_lst
+    if not rows:
+        return None
+    return [_Cell(tc, table).text.strip().lower() for tc in rows[0].tc_lst]
+
+
+def _find_bound_tables(doc, signatures: List[tuple]) -> list:
+    """
+    One pass over the body's tables: for each signature, the first table
+    whose header cells contain its texts column by column (None if none).
+    A table is bound to at most one signature.
+    """
+    found = [None] * len(signatures)
+    for table in doc.tables:
+        headers = _header_signature(table)
+        if headers is None:
+            continue
+        for index, signature in enumerate(signatures):
+            if found[index] is None and len(headers) == len(signature) and all(
+                expected in header for expected, header in zip(signature, headers)
+            ):
+                found[index] = table
+                break
+        if all(table is not None for table in found):
+            break
+    return found
+
+
+def render_docx_tables(template_bytes: bytes, tables: list, timer=NULL_TIMER, compression: Optional[str] = None,
+                       formatting: Optional[str] = None):
+    """
+    Fill several template tables in one load/save. tables is a list of
+    (header signature, fields, form_headers, grouped requirements); the
+    signature is the lowercase text each header cell must contain, fields
+    the requirement field written to each column. Raises ValueError naming
+    any signature that matches no table.
+    """
+    with timer.stage("template_load"):
+        doc = Document(BytesIO(template_bytes))
+
+    with timer.stage("render_table"):
+        targets = _find_bound_tables(doc, [signature for signature, *_ in tables])
+        missing = [list(signature) for (signature, *_), table in zip(tables, targets) if table is None]
+        if missing:
+            raise ValueError(f"No template table has the headers {missing}")
+        for (signature, fields, form_headers, requirements), table in zip(tables, targets):
+            total_reqs = _fill_table(table, requirements, fields, form_headers, formatting)
+            logger.info(f"Rendered table {list(signature)} with {total_reqs} requirements")
+
+    with timer.stage("save"):
+        out = save_docx(doc, compression)
+    return out
+
+
+# ------------------------------------------------------------------------------
+# Incremental regeneration
+# ------------------------------------------------------------------------------
+# Every rendered BRD carries a fingerprint of its table in a custom document
+# property (docProps/custom.xml, which Word keeps when the file is edited):
+# {"version": 1, "forms": [{"form", "hash", "rows"}, ...]} in table order,
+# where rows counts the form header row plus its requirement rows. Given the
+# previous BRD, render_docx_incremental() rewrites only the rows of forms
+# whose hash changed and leaves every other row element untouched.
+
+FINGERPRINT_PROPERTY = "BRDFingerprint"
+FINGERPRINT_VERSION = 1
+
+CUSTOM_PROPERTIES_PARTNAME = "/docProps/custom.xml"
+CUSTOM_PROPERTIES_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.custom-properties+xml"
+NS_CUSTOM_PROPERTIES = "http://schemas.openxmlformats.org/officeDocument/2006/custom-properties"
+NS_VT = "http://schemas.openxmlformats.org/officeDocument/2006/docPropsVTypes"
+# Format id Word uses for user-defined custom properties
+CUSTOM_PROPERTY_FMTID = "{D5CDD505-2E9C-101B-9397-08002B2CF9AE}"
+
+
+class _Segment(NamedTuple):
+    form: str
+    hash: str
+    rows: list  # <w:tr> elements: form header row, then requirement rows
+
+
+def _hash_rows(rows) -> str:
+    """Short digest of a form's requirement rows, each a sequence of ROW_FIELDS values."""
+    digest = hashlib.sha256()
+    for row in rows:
+        for value in row:
+            digest.update(str(value).encode("utf-8"))
+            digest.update(b"\x1f")
+        digest.update(b"\x1e")
+    return digest.hexdigest()[:16]
+
+
+def _rendered_groups(requirements: list) -> list:
+    """The groups _fill_requirements_table() actually writes, in order."""
+    return [
+        group for group in requirements
+        if isinstance(group, dict) and group.get("form") and group.get("requirements")
+    ]
+
+
+def _group_hash(group: dict) -> str:
+    return _hash_rows([req.get(key, "") for key in ROW_FIELDS] for req in group["requirements"])
+
+
+def build_fingerprint(requirements: list) -> dict:
+    return {
+        "version": FINGERPRINT_VERSION,
+        "forms": [
+            {"form": group["form"], "hash": _group_hash(group), "rows": 1 + len(group["requirements"])}
+            for group in _rendered_groups(requirements)
+        ],
+    }
+
+
+def _custom_properties_part(doc, create: bool = False):
+    package = doc.part.package
+    for rel in package.rels.values():
+        if rel.reltype == RT.CUSTOM_PROPERTIES and not rel.is_external:
+            return rel.target_part
+    if not create:
+        return None
+    blob = (
+        f'<Properties xmlns="{NS_CUSTOM_PROPERTIES}" xmlns:vt="{NS_VT}"></Properties>'
+    ).encode()
+    part = Part(PackURI(CUSTOM_PROPERTIES_PARTNAME), CUSTOM_PROPERTIES_CONTENT_TYPE, blob, package)
+    package.relate_to(part, RT.CUSTOM_PROPERTIES)
+    return part
+
+
+def _store_fingerprint(doc, fingerprint: dict) -> None:
+    """Write the fingerprint into the document's custom properties, keeping any others."""
+    from lxml import etree
+
+    part = _custom_properties_part(doc, create=True)
+    root = etree.fromstring(part.blob)
+    prop_tag = f"{{{NS_CUSTOM_PROPERTIES}}}property"
+    existing = None
+    for prop in root.iter(prop_tag):
+        if prop.get("name") == FINGERPRINT_PROPERTY:
+            existing = prop
+    if existing is not None:
+        root.remove(existing)
+    # Property ids start at 2 and must be unique within the part
+    pid = max([int(p.get("pid", "1")) for p in root.iter(prop_tag)] + [1]) + 1
+    prop = etree.SubElement(root, prop_tag, fmtid=CUSTOM_PROPERTY_FMTID, pid=str(pid), name=FINGERPRINT_PROPERTY)
+    etree.SubElement(prop, f"{{{NS_VT}}}lpwstr").text = json.dumps(fingerprint, ensure_ascii=False, separators=(",", ":"))
+    part._blob = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+
+def read_fingerprint(doc) -> Optional[dict]:
+    """The fingerprint stored by render_docx(), or None if absent or unreadable."""
+    from lxml import etree
+
+    part = _custom_properties_part(doc)
+    if part is None:
+        return None
+    try:
+        root = etree.fromstring(part.blob)
+    except etree.XMLSyntaxError:
+        return None
+    for prop in root.iter(f"{{{NS_CUSTOM_PROPERTIES}}}property"):
+        if prop.get("name") == FINGERPRINT_PROPERTY:
+            return parse_fingerprint("".join(prop.itertext()))
+    return None
+
+
+def parse_fingerprint(text: str) -> Optional[dict]:
+    try:
+        fingerprint = json.loads(text)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(fingerprint, dict) or fingerprint.get("version") != FINGERPRINT_VERSION:
+        return None
+    forms = fingerprint.get("forms")
+    if not isinstance(forms, list) or not all(
+        isinstance(f, dict) and isinstance(f.get("rows"), int) and f["rows"] >= 1 for f in forms
+    ):
+        return None
+    return fingerprint
+
+
+def _segments_from_fingerprint(table, rows: list, fingerprint: dict) -> Optional[List[_Segment]]:
+    """Split the data rows by the fingerprint's row counts; None if they do not line up."""
+    forms = fingerprint["forms"]
+    if sum(f["rows"] for f in forms) != len(rows):
+        return None
+    segments = []
+    start = 0
+    for entry in forms:
+        header = rows[start]
+        # Each segment must start at a merged form header row carrying the form name
+        if len(header.tc_lst) != 1 or _Cell(header.tc_lst[0], table).text != entry["form"]:
+            return None
+        segments.append(_Segment(entry["form"], entry["hash"], rows[start:start + entry["rows"]]))
+        start += entry["rows"]
+    return segments
+
+
+def _segments_from_table(table, rows: list) -> List[_Segment]:
+    """Rebuild segments and hashes from the table text (no usable fingerprint)."""
+    segments = []
+    form, form_rows, values = None, [], []
+    for tr in rows:
+        if len(tr.tc_lst) == 1:
+            if form is not None:
+                segments.append(_Segment(form, _hash_rows(values), form_rows))
+            form, form_rows, values = _Cell(tr.tc_lst[0], table).text, [tr], []
+        elif form is not None:
+            form_rows.append(tr)
+            values.append([_Cell(tc, table).text for tc in tr.tc_lst])
+        # Requirement rows before the first form header cannot be matched; they are rebuilt
+    if form is not None:
+        segments.append(_Segment(form, _hash_rows(values), form_rows))
+    return segments
+
+
+def render_docx_incremental(
+    previous_bytes: bytes,
+    requirements: list,
+    fingerprint: Optional[dict] = None,
+    timer=NULL_TIMER,
+    compression: Optional[str] = None,
+    formatting: Optional[str] = None,
+):
+    """
+    Update a previously generated BRD in place: forms whose requirements hash
+    is unchanged keep their existing row XML, changed and new forms are
+    rendered, and forms no longer present are removed. The table layout comes
+    from `fingerprint`, else the one stored in the document, else the table
+    text. Returns (BytesIO, stats) where stats counts forms by outcome.
+    """
+    with timer.stage("template_load"):
+        doc = Document(BytesIO(previous_bytes))
+
+    with timer.stage("render_table"):
+        table = _find_requirements_table(doc)
+        if table is None:
+            raise ValueError("The previous BRD has no Functional Requirements table")
+        tbl = table._tbl
+        header, *rows = tbl.tr_lst
+
+        segments = None
+        for candidate in (fingerprint, read_fingerprint(doc)):
+            if candidate is not None:
+                segments = _segments_from_fingerprint(table, rows, candidate)
+                if segments is not None:
+                    break
+        source = "fingerprint"
+        if segments is None:
+            source = "table text"
+            segments = _segments_from_table(table, rows)
+
+        groups = _rendered_groups(requirements)
+        new_forms = {group["form"] for group in groups}
+        old_by_form = {}
+        stale = []
+        for segment in segments:
+            if segment.form in new_forms and segment.form not in old_by_form:
+                old_by_form[segment.form] = segment
+            else:
+                stale.append(segment)
+        stats = {"unchanged": 0, "changed": 0, "added": 0, "removed": len(stale)}
+
+        # Drop removed forms and unclaimed rows first, so unchanged forms
+        # end up adjacent and need no moving
+        if source == "table text":
+            claimed = {id(tr) for segment in segments for tr in segment.rows}
+            for tr in rows:
+                if id(tr) not in claimed:
+                    tbl.remove(tr)
+        for segment in stale:
+            for tr in segment.rows:
+                tbl.remove(tr)
+
+        # Walk the new groups in order, placing each after the previous one
+        writer = None
+        cursor = header
+        for group in groups:
+            segment = old_by_form.get(group["form"])
+            if segment is not None and segment.hash == _group_hash(group):
+                stats["unchanged"] += 1
+                if cursor.getnext() is not segment.rows[0]:
+                    # Form moved: relocate its rows, still without rebuilding them
+                    for tr in segment.rows:
+                        cursor.addnext(tr)
+                        cursor = tr
+                else:
+                    cursor = segment.rows[-1]
+                continue
+
+            if segment is not None:
+                stats["changed"] += 1
+                for tr in segment.rows:
+                    tbl.remove(tr)
+            else:
+                stats["added"] += 1
+            if writer is None:
+                writer = _row_writer(table, formatting=formatting)
+            new_rows = [writer.add_form_header(group["form"])]
+            new_rows += [writer.add_requirement(req) for req in group["requirements"]]
+            for tr in new_rows:
+                cursor.addnext(tr)
+                cursor = tr
+
+        _store_fingerprint(doc, build_fingerprint(groups))
+
+    logger.info(
+        f"Incremental render from {source}: {stats['unchanged']} forms unchanged, {stats['changed']} changed, "
+        f"{stats['added']} added, {stats['removed']} removed"
+    )
+
+    with timer.stage("save"):
+        out = save_docx(doc, compression)
+    return out, stats
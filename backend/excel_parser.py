@@ -0,0 +1,343 @@
+"""
+Excel parsing: read the requirements sheet and group requirements by Form.
+
+Kept out of main.py so pandas/openpyxl are only imported when a workbook is
+actually parsed.
+
+parse_excel_to_requirements() loads the whole sheet with pandas. For
+streaming and sampling, iter_requirements() reads rows one at a time with
+openpyxl's read-only mode instead; both share the cell-to-text conversion,
+so they produce the same requirement dicts.
+
+Which columns hold which field, and which row holds the headers, comes from
+a column mapping profile (see column_mapping.py); the header row is looked
+for in the first HEADER_SCAN_ROWS rows.
+
+By default groups keep first-seen form order and requirements keep sheet
+order; sort_by/group_by (defaults REQUIREMENT_SORT/REQUIREMENT_GROUP, see
+column_mapping.py) regroup them in natural order instead, e.g. PRJ_01.2
+before PRJ_01.10.
+"""
+import logging
+import math
+import re
+from io import BytesIO
+from itertools import groupby
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd # type: ignore 
+from dotenv import load_dotenv
+
+from column_mapping import FIELDS, ColumnMatcher, get_matcher, natural_key, resolve_ordering
+from metrics import NULL_TIMER
+
+load_dotenv()
+
+logger = logging.getLogger("brd-utility")
+
+# ------------------------------------------------------------------------------
+# Excel parsing helpers
+# ------------------------------------------------------------------------------
+# normalize_header and EXPECTED_HEADERS predate column mapping profiles; the
+# parser no longer uses them but they stay importable from main.
+def normalize_header(h: str) -> str:
+    """Normalize Excel header: lowercase, collapse spaces."""
+    normalized = re.sub(r"\s+", " ", str(h or "")).strip().lower()
+    # Handle status column variations - normalize all status columns to "status *"
+    if "status" in normalized:
+        return "status *"
+    return normalized
+
+# Expected (case/space-insensitive) headers from your Excel:
+EXPECTED_HEADERS = [
+    "form",
+    "req id#*",
+    "section*",
+    "description *",
+    "status *",
+]
+
+# filter_mode -> statuses kept (lowercase); modes not listed keep everything
+STATUS_FILTERS = {
+    "final": {"final"},
+    "final_or_approved": {"final", "approved"},
+}
+
+
+def cell_text(value) -> str:
+    """
+    Text of a cell value. Empty cells (None from openpyxl, NaN from pandas)
+    become "" rather than "nan", and whole-number floats lose their ".0"
+    (pandas turns an integer column with blanks into floats).
+    """
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ""
+        if value.is_integer():
+            return str(int(value))
+    return str(value).strip()
+
+
+def _status_filter(filter_mode: str):
+    return STATUS_FILTERS.get((filter_mode or "none").lower())
+
+
+def _group_by_form(reqs: Iterable[dict]) -> List[dict]:
+    """[{"form", "requirements"}] in order of each form's first appearance."""
+    reqs_by_form: Dict[str, List[dict]] = {}
+    for req in reqs:
+        reqs_by_form.setdefault(req.get("form", "Other"), []).append(req)
+    return [{"form": form_name, "requirements": form_reqs} for form_name, form_reqs in reqs_by_form.items()]
+
+
+def _sorted_groups(reqs: List[dict], sort_by: str, group_by: str) -> List[dict]:
+    """
+    Group reqs by group_by and order them with one decorated sort.
+    Requirements come in natural order of sort_by, ties in sheet order;
+    groups come in order of their first requirement, so sorting by req_id
+    puts PRJ_01.x groups before PRJ_02.x whatever their names, with the
+    group name breaking ties (and deciding outright when sort_by and
+    group_by are the same field). With sort_by "sheet", groups and
+    requirements keep first-seen order. Each distinct value's natural key
+    is computed once.
+    """
+    key_cache: Dict[str, tuple] = {}
+
+    def cached_key(value: str) -> tuple:
+        key = key_cache.get(value)
+        if key is None:
+            key = key_cache[value] = natural_key(value)
+        return key
+
+    if sort_by == "sheet":
+        first_seen: Dict[str, int] = {}
+        keys = [(first_seen.setdefault(req[group_by], len(first_seen)), i) for i, req in enumerate(reqs)]
+    else:
+        group_first: Dict[str, tuple] = {}
+        for req in reqs:
+            name, value = req[group_by], cached_key(req[sort_by])
+            if name not in group_first or value < group_first[name]:
+                group_first[name] = value
+        keys = [
+            (group_first[req[group_by]], cached_key(req[group_by]), cached_key(req[sort_by]), i)
+            for i, req in enumerate(reqs)
+        ]
+    order = sorted(range(len(reqs)), key=keys.__getitem__)
+
+    # "form" is the group title the renderer shows, whatever the grouping field
+    return [
+        {"form": name, "requirements": [reqs[i] for i in positions]}
+        for name, positions in groupby(order, key=lambda i: reqs[i][group_by])
+    ]
+
+
+def parse_excel_to_requirements(
+    excel_bytes: bytes,
+    sheet_name: Optional[str] = None,
+    filter_mode: str = "none",
+    timer=NULL_TIMER,
+    profile: Optional[str] = None,
+    sort_by: Optional[str] = None,
+    group_by: Optional[str] = None,
+):
+    """
+    Read Excel, validate headers, and return a list of dicts with keys:
+    req_id, section, description, status
+
+    Option A fix:
+    - If sheet_name is not provided, default to the FIRST sheet (index 0),
+      so pandas returns a single DataFrame (not a dict of DataFrames).
+
+    Headers are resolved with the named column mapping profile (default:
+    COLUMN_PROFILE), so the sheet is read without a header row and the
+    header row is located afterwards.
+    """
+    sort_by, group_by = resolve_ordering(sort_by, group_by)
+    matcher = get_matcher(profile)
+    # ✅ Option A: default to first sheet when sheet_name is None/empty
+    target_sheet = sheet_name if sheet_name else 0
+    with timer.stage("read_excel"):
+        df = pd.read_excel(BytesIO(excel_bytes), sheet_name=target_sheet, header=None, engine="openpyxl")
+
+    with timer.stage("row_loop"):
+        return _rows_to_groups(df, filter_mode, matcher, sort_by, group_by)
+
+
+def parse_excel_tables(
+    excel_bytes: bytes,
+    specs: list,
+    sheet_name: Optional[str] = None,
+    filter_mode: str = "none",
+    profile: Optional[str] = None,
+    sort_by: Optional[str] = None,
+    group_by: Optional[str] = None,
+    timer=NULL_TIMER,
+) -> List[list]:
+    """
+    parse_excel_to_requirements() for several specs at once (objects with
+    sheet, filter_mode, column_profile, sort_by and group_by attributes,
+    None meaning the given defaults). Every sheet involved is read in one
+    pandas call, so the workbook is opened and its shared strings loaded
+    once. Returns one grouped list per spec.
+    """
+    resolved = []
+    for spec in specs:
+        resolved.append((
+            spec.sheet or sheet_name or 0,
+            spec.filter_mode or filter_mode,
+            get_matcher(spec.column_profile or profile),
+            *resolve_ordering(spec.sort_by or sort_by, spec.group_by or group_by),
+        ))
+    sheets = list(dict.fromkeys(entry[0] for entry in resolved))
+
+    with timer.stage("read_excel"):
+        frames = pd.read_excel(BytesIO(excel_bytes), sheet_name=sheets, header=None, engine="openpyxl")
+
+    with timer.stage("row_loop"):
+        return [
+            _rows_to_groups(frames[sheet], spec_filter, matcher, sort_by, group_by)
+            for sheet, spec_filter, matcher, sort_by, group_by in resolved
+        ]
+
+
+def _rows_to_groups(df, filter_mode: str, matcher: ColumnMatcher, sort_by: str = "sheet", group_by: str = "form"):
+    """Find the header row, build requirement dicts and group them by Form."""
+
+    # Only the first HEADER_SCAN_ROWS rows are looked at for the headers
+    header_row, positions = matcher.find_header_row(df.itertuples(index=False, name=None))
+
+    # Transform rows - create flat list with form info
+    reqs = []
+    current_form = None
+
+    # Plain column lists are far cheaper to walk than df.iterrows(), which
+    # builds a Series per row. Optional fields missing from the sheet read as "".
+    body = df.iloc[header_row + 1:]
+    columns = [
+        body.iloc[:, positions[field]].tolist() if field in positions else [None] * len(body)
+        for field in FIELDS
+    ]
+
+    for form_value, req_id_value, section, description, status in zip(*columns):
+        # Get Form (section heading) - keep track of current form
+        form = cell_text(form_value)
+        if form:
+            current_form = form
+        
+        # Get requirement ID
+        req_id = cell_text(req_id_value)
+        if not req_id:
+            continue  # skip blank id rows
+
+        item = {
+            "req_id": req_id,
+            "section": cell_text(section),
+            "description": cell_text(description),
+            "status": cell_text(status),
+            "form": current_form if current_form else "",  # Include form with each requirement
+        }
+        reqs.append(item)
+    
+    # Apply filtering if needed
+    statuses = _status_filter(filter_mode)
+    if statuses is not None:
+        reqs = [r for r in reqs if r["status"].lower() in statuses]
+    
+    if sort_by == "sheet" and group_by == "form":
+        grouped_reqs = _group_by_form(reqs)
+    else:
+        grouped_reqs = _sorted_groups(reqs, sort_by, group_by)
+    
+    logger.info(f"Parsed {len(reqs)} requirements in {len(grouped_reqs)} form groups")
+    
+    # Return grouped structure for template
+    return grouped_reqs
+
+
+# ------------------------------------------------------------------------------
+# Streaming parse
+# ------------------------------------------------------------------------------
+def iter_requirements(
+    excel_bytes: bytes,
+    sheet_name: Optional[str] = None,
+    filter_mode: str = "none",
+    profile: Optional[str] = None,
+) -> Iterator[dict]:
+    """
+    Requirement dicts one row at a time, in sheet order, with the same keys
+    and filtering as parse_excel_to_requirements(). Opening the sheet and
+    checking its headers happens before this returns, so a bad workbook
+    raises ValueError here rather than part-way through iteration.
+    """
+    import openpyxl
+
+    matcher = get_matcher(profile)
+    workbook = openpyxl.load_workbook(BytesIO(excel_bytes), read_only=True, data_only=True)
+    try:
+        if sheet_name:
+            if sheet_name not in workbook.sheetnames:
+                raise ValueError(f"Worksheet named '{sheet_name}' not found")
+            sheet = workbook[sheet_name]
+        else:
+            sheet = workbook.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+        # Consumes rows up to and including the header row
+        _, columns = matcher.find_header_row(rows)
+    except Exception:
+        workbook.close()
+        raise
+
+    return _stream_rows(workbook, rows, columns, _status_filter(filter_mode))
+
+
+def _stream_rows(workbook, rows, columns: Dict[str, int], statuses) -> Iterator[dict]:
+    # Optional fields missing from the sheet get an index past every row
+    form_i, id_i, section_i, description_i, status_i = (columns.get(f, math.inf) for f in FIELDS)
+    current_form = ""
+    try:
+        for row in rows:
+            width = len(row)
+            form = cell_text(row[form_i]) if form_i < width else ""
+            if form:
+                current_form = form
+            req_id = cell_text(row[id_i]) if id_i < width else ""
+            if not req_id:
+                continue
+            status = cell_text(row[status_i]) if status_i < width else ""
+            if statuses is not None and status.lower() not in statuses:
+                continue
+            yield {
+                "req_id": req_id,
+                "section": cell_text(row[section_i]) if section_i < width else "",
+                "description": cell_text(row[description_i]) if description_i < width else "",
+                "status": status,
+                "form": current_form,
+            }
+    finally:
+        workbook.close()
+
+
+def iter_form_runs(requirements: Iterable[dict]) -> Iterator[dict]:
+    """
+    {"form", "requirements"} for each run of consecutive requirements with
+    the same form. Only one run is held in memory, so a form that appears in
+    two separate blocks of the sheet yields two runs.
+    """
+    for form, run in groupby(requirements, key=lambda r: r["form"]):
+        yield {"form": form, "requirements": list(run)}
+
+
+def sample_requirements(
+    excel_bytes: bytes,
+    sheet_name: Optional[str] = None,
+    limit: int = 100,
+    profile: Optional[str] = None,
+) -> List[dict]:
+    """The first `limit` requirements grouped like parse_excel_to_requirements()."""
+    requirements = iter_requirements(excel_bytes, sheet_name, profile=profile)
+    try:
+        return _group_by_form(r for _, r in zip(range(limit), requirements))
+    finally:
+        requirements.close()
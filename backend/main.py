@@ -1,22 +1,30 @@
+import json
 import logging
-import re
+import time
+from itertools import islice
 from io import BytesIO
 from typing import Optional
 from pydantic import BaseModel, EmailStr
 
-import pandas as pd # type: ignore 
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, status, Depends # type: ignore 
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, status, Depends, Request # type: ignore 
 from fastapi.middleware.cors import CORSMiddleware # type: ignore 
-from starlette.responses import StreamingResponse, JSONResponse # type: ignore 
-from docx import Document # type: ignore
-from docx.shared import Pt, RGBColor # type: ignore
-from docx.enum.text import WD_ALIGN_PARAGRAPH # type: ignore
-from docx.oxml import OxmlElement # type: ignore
-from docx.oxml.ns import qn # type: ignore
+from starlette.concurrency import run_in_threadpool # type: ignore 
+from starlette.responses import StreamingResponse, JSONResponse, PlainTextResponse # type: ignore 
 
 # Import authentication and database modules
 from auth import verify_password, get_password_hash, create_access_token, get_current_user
-from database import init_database, create_user, get_user_by_username, get_user_by_email 
+from database import DB_INIT_MODE, init_database, create_user, get_user_by_username, get_user_by_email 
+from warmup import get_warmup_status, start_preload, start_warmup
+from metrics import METRICS_ENABLED, REGISTRY, FunctionMetric, new_timer, record_generation, record_request
+from user_cache import user_cache
+from profiling import request_profiler
+from coalesce import generation_flights, request_key
+from scheduler import GenerationQueueFull, generation_scheduler
+from column_mapping import HEADER_SCAN_ROWS, get_matcher, resolve_ordering
+from table_bindings import DEFAULT_BINDINGS, parse_bindings
+from requirements_validation import GENERATE_VALIDATION, VALIDATION_MODES, RequirementsInvalid, summary_header, validate_requirements
+from zip_inspect import UploadRejected, inspect_upload
+from memory_guard import MemoryBudgetBusy, MemoryBudgetExceeded, estimate_generation_bytes, measure_peak, memory_guard
 
 # ------------------------------------------------------------------------------
 # App & CORS
@@ -185,20 +193,130 @@ async def get_current_user_info(current_user: dict = Depends(get_current_user)):
 def health():
     return {"status": "ok"}
 
+# ------------------------------------------------------------------------------
+# Metrics (Prometheus text format); disabled entirely with METRICS_ENABLED=false
+# ------------------------------------------------------------------------------
+if METRICS_ENABLED:
+    REGISTRY.register(FunctionMetric(
+        "brd_user_cache_hits_total", "User lookup cache hits", lambda: user_cache.hits, kind="counter"))
+    REGISTRY.register(FunctionMetric(
+        "brd_user_cache_misses_total", "User lookup cache misses", lambda: user_cache.misses, kind="counter"))
+    REGISTRY.register(FunctionMetric(
+        "brd_user_cache_hit_ratio", "User lookup cache hit ratio since start", lambda: user_cache.stats()["hit_rate"]))
+    REGISTRY.register(FunctionMetric(
+        "brd_warmup_duration_seconds", "Duration of the startup warm-up", lambda: get_warmup_status()["duration_s"]))
+
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        start = time.perf_counter()
+        response = await call_next(request)
+        route = request.scope.get("route")
+        record_request(
+            getattr(route, "path", "unmatched"), request.method, response.status_code,
+            time.perf_counter() - start,
+        )
+        return response
+
+    @app.get("/metrics")
+    def metrics():
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 # Test endpoint to see parsed data structure
+# ?stream= values for /test-parse: one NDJSON line per form run or per requirement
+NDJSON_STREAM_MODES = ("groups", "requirements")
+
+
+def _ndjson_lines(records, limit: Optional[int]):
+    """Serialize records as NDJSON; runs in Starlette's thread pool as the response is sent."""
+    try:
+        for record in islice(records, limit):
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+    finally:
+        records.close()
+
+
 @app.post("/test-parse")
-async def test_parse(excel: UploadFile = File(...), sheet_name: str | None = Form(None)):
-    """Test endpoint to see how Excel is being parsed"""
+async def test_parse(
+    request: Request,
+    excel: UploadFile = File(...),
+    sheet_name: str | None = Form(None),
+    stream: str | None = Form(None),  # options: "groups" | "requirements" (NDJSON)
+    limit: int | None = Form(None),  # return only the first N requirements (or lines when streaming)
+    column_profile: str | None = Form(None),  # column mapping profile; default COLUMN_PROFILE
+    sort_by: str | None = Form(None),  # options: "sheet" | "req_id" | "section"; default REQUIREMENT_SORT
+    group_by: str | None = Form(None),  # options: "form" | "section"; default REQUIREMENT_GROUP
+):
+    """
+    Test endpoint to see how Excel is being parsed.
+
+    With stream set, the response is NDJSON produced while the sheet is read
+    row by row, so memory stays bounded however large the sheet is:
+    "groups" emits one {"form", "requirements"} line per run of consecutive
+    rows with the same form, "requirements" one line per requirement.
+    Streaming keeps sheet order, so it cannot be combined with sort_by or
+    group_by (400), and REQUIREMENT_SORT/REQUIREMENT_GROUP do not apply.
+    """
+    timer = new_timer("test-parse")
+    if stream and stream not in NDJSON_STREAM_MODES:
+        return JSONResponse({"error": f"stream must be one of {list(NDJSON_STREAM_MODES)}"}, status_code=400)
+    if stream and (sort_by or group_by):
+        return JSONResponse({"error": "sort_by and group_by cannot be combined with stream"}, status_code=400)
+    if limit is not None and limit < 1:
+        return JSONResponse({"error": "limit must be a positive integer"}, status_code=400)
     try:
-        excel_bytes = await excel.read()
-        requirements = parse_excel_to_requirements(excel_bytes, sheet_name=sheet_name, filter_mode="none")
-        return {
+        from excel_parser import iter_form_runs, iter_requirements, parse_excel_to_requirements, sample_requirements
+
+        if stream:
+            with timer.stage("upload_read"):
+                excel_bytes = await excel.read()
+            with timer.stage("inspect"):
+                inspect_upload(excel_bytes, "xlsx", "Excel upload", sheet_name)
+            # Opens the sheet and checks headers now, so errors still get a 400
+            requirements = await run_in_threadpool(
+                iter_requirements, excel_bytes, sheet_name, profile=column_profile,
+            )
+            records = iter_form_runs(requirements) if stream == "groups" else requirements
+            return StreamingResponse(
+                _ndjson_lines(records, limit), media_type="application/x-ndjson", headers=timer.headers()
+            )
+
+        with request_profiler(request, "test-parse") as profiler:
+            with timer.stage("upload_read"):
+                excel_bytes = await excel.read()
+            with timer.stage("inspect"):
+                excel_info = inspect_upload(excel_bytes, "xlsx", "Excel upload", sheet_name)
+            estimate = (
+                estimate_generation_bytes(excel_bytes, sheet_name=sheet_name, rows=excel_info.sheet_rows)
+                if memory_guard.enabled else None
+            )
+            async with memory_guard.reserve(estimate):
+                async with measure_peak("test-parse", estimate):
+                    if limit:
+                        requirements = await run_in_threadpool(
+                            profiler.run, sample_requirements, excel_bytes, sheet_name, limit, column_profile,
+                        )
+                    else:
+                        requirements = await run_in_threadpool(
+                            profiler.run, parse_excel_to_requirements,
+                            excel_bytes, sheet_name=sheet_name, filter_mode="none", timer=timer,
+                            profile=column_profile, sort_by=sort_by, group_by=group_by,
+                        )
+        with timer.stage("validate"):
+            report = validate_requirements(requirements)
+        timer.record()
+        record_generation("test-parse", rows=sum(len(g["requirements"]) for g in requirements))
+        return JSONResponse({
             "total_groups": len(requirements),
             "groups": requirements,
-            "sample_structure": requirements[0] if requirements else None
-        }
+            "sample_structure": requirements[0] if requirements else None,
+            "validation": report,
+        }, headers={**timer.headers(), **profiler.headers()})
+    except (MemoryBudgetExceeded, MemoryBudgetBusy) as e:
+        return _rejection_response(e)
+    except UploadRejected as e:
+        return JSONResponse({"error": str(e)}, status_code=e.status_code)
     except Exception as e:
-        return JSONResponse({"error": str(e)}, status_code=400)
+        return JSONResponse({"error": str(e)}, status_code=400, headers=timer.headers())
 
 # CORS configuration - supports both development and production
 import os
@@ -206,6 +324,11 @@ from dotenv import load_dotenv
 
 load_dotenv()
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
+# Import the Excel/Word modules in a background thread right after startup
+PRELOAD_HEAVY_MODULES = os.getenv("PRELOAD_HEAVY_MODULES", "true").lower() in ("1", "true", "yes")
+# Also run a tiny synthetic workbook through parse + render in the background
+# (includes the preload); readiness is not delayed either way
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "false").lower() in ("1", "true", "yes")
 
 if ENVIRONMENT == "production":
     # Production: Get allowed origins from environment or use default
@@ -236,6 +359,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets the frontend read generation validation results
+    expose_headers=["X-Validation-Issues"],
 )
 
 # ------------------------------------------------------------------------------
@@ -246,334 +371,521 @@ logger = logging.getLogger("brd-utility")
 
 @app.on_event("startup")
 async def on_startup():
-    # Initialize database and create tables
-    try:
-        init_database()
-        logger.info("Database initialized successfully")
-    except Exception as e:
-        logger.error(f"Database initialization failed: {str(e)}")
-        logger.warning("Application will continue, but authentication may not work")
+    # Check the schema version and apply pending migrations
+    if DB_INIT_MODE == "skip":
+        logger.info("DB_INIT_MODE=skip: skipping database initialization")
+    else:
+        try:
+            init_database()
+            logger.info("Database initialized successfully")
+        except Exception as e:
+            logger.error(f"Database initialization failed: {str(e)}")
+            logger.warning("Application will continue, but authentication may not work")
     
     logger.info("FastAPI started. Listing routes:")
     for r in app.routes:
         logger.info("Route loaded: %s %s", getattr(r, "methods", None), getattr(r, "path", None))
 
+    if WARMUP_ON_STARTUP:
+        start_warmup()
+    elif PRELOAD_HEAVY_MODULES:
+        start_preload()
+
 
 # ------------------------------------------------------------------------------
-# Excel parsing helpers
+# Excel parsing and Word rendering live in excel_parser.py / docx_renderer.py.
+# pandas, openpyxl and python-docx are imported on first use (or by the
+# background preload) so /health, auth and CORS come up without them.
 # ------------------------------------------------------------------------------
-def normalize_header(h: str) -> str:
-    """Normalize Excel header: lowercase, collapse spaces."""
-    normalized = re.sub(r"\s+", " ", str(h or "")).strip().lower()
-    # Handle status column variations - normalize all status columns to "status *"
-    if "status" in normalized:
-        return "status *"
-    return normalized
-
-# Expected (case/space-insensitive) headers from your Excel:
-EXPECTED_HEADERS = [
-    "form",
-    "req id#*",
-    "section*",
-    "description *",
-    "status *",
-]
-
-def parse_excel_to_requirements(
-    excel_bytes: bytes,
-    sheet_name: Optional[str] = None,
-    filter_mode: str = "none",
-):
-    """
-    Read Excel, validate headers, and return a list of dicts with keys:
-    req_id, section, description, status
+_LAZY_EXPORTS = {
+    "parse_excel_to_requirements": "excel_parser",
+    "normalize_header": "excel_parser",
+    "EXPECTED_HEADERS": "excel_parser",
+    "render_docx": "docx_renderer",
+}
 
-    Option A fix:
-    - If sheet_name is not provided, default to the FIRST sheet (index 0),
-      so pandas returns a single DataFrame (not a dict of DataFrames).
-    """
-    # ✅ Option A: default to first sheet when sheet_name is None/empty
-    target_sheet = sheet_name if sheet_name else 0
-    df = pd.read_excel(BytesIO(excel_bytes), sheet_name=target_sheet, engine="openpyxl")
 
-    # Normalize column names
-    df.columns = [normalize_header(c) for c in df.columns]
-
-    # Validate required columns exist
-    missing = [c for c in EXPECTED_HEADERS if c not in df.columns]
-    if missing:
-        raise ValueError(f"Missing required Excel columns: {missing}")
-
-    # Transform rows - create flat list with form info
-    reqs = []
-    current_form = None
-    
-    for _, row in df.iterrows():
-        # Get Form (section heading) - keep track of current form
-        form = str(row.get("form", "")).strip()
-        if form:
-            current_form = form
-        
-        # Get requirement ID
-        req_id = str(row.get("req id#*", "")).strip()
-        if not req_id:
-            continue  # skip blank id rows
-
-        item = {
-            "req_id": req_id,
-            "section": str(row.get("section*", "")).strip(),
-            "description": str(row.get("description *", "")).strip(),
-            "status": str(row.get("status *", "")).strip(),
-            "form": current_form if current_form else "",  # Include form with each requirement
-        }
-        reqs.append(item)
-    
-    # Apply filtering if needed
-    fm = (filter_mode or "none").lower()
-    if fm == "final":
-        reqs = [r for r in reqs if r["status"].lower() == "final"]
-    elif fm == "final_or_approved":
-        reqs = [r for r in reqs if r["status"].lower() in ("final", "approved")]
-    
-    # Also create grouped structure for templates that need it
-    reqs_by_form = {}
-    for req in reqs:
-        form_name = req.get("form", "Other")
-        if form_name not in reqs_by_form:
-            reqs_by_form[form_name] = []
-        reqs_by_form[form_name].append(req)
-    
-    # Return both flat list and grouped structure
-    grouped_reqs = []
-    for form_name, form_reqs in reqs_by_form.items():
-        grouped_reqs.append({
-            "form": form_name,
-            "requirements": form_reqs
-        })
-    
-    logger.info(f"Parsed {len(reqs)} requirements in {len(grouped_reqs)} form groups")
-    
-    # Return grouped structure for template
-    return grouped_reqs
+def __getattr__(name):
+    # Keeps `from main import render_docx, parse_excel_to_requirements` working
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    return getattr(importlib.import_module(module_name), name)
 
 
 # ------------------------------------------------------------------------------
-# Word rendering - Programmatic approach matching brd_updater.py logic
+# /generate endpoint
 # ------------------------------------------------------------------------------
-
-# Color constants matching brd_updater.py
-TABLE_HEADER_COLOR = (0, 176, 240)  # RGB: Blue
-FORM_HEADER_COLOR = (0, 176, 240)   # RGB: Blue
-
-def _set_cell_background(cell, color: tuple):
-    """Set cell background color - matching brd_updater.py logic"""
-    cell_properties = cell._element.get_or_add_tcPr()
-    shading = OxmlElement('w:shd')
-    # Convert RGB to hex (e.g., (0, 176, 240) → '00B0F0')
-    hex_color = '{:02X}{:02X}{:02X}'.format(color[0], color[1], color[2])
-    shading.set(qn('w:fill'), hex_color)
-    cell_properties.append(shading)
-
-def _format_header_row(table):
-    """Format table header row - matching brd_updater.py format_header_row()"""
-    header_row = table.rows[0]  # First row
-    for cell in header_row.cells:
-        # Background color: Blue (RGB: 0, 176, 240)
-        _set_cell_background(cell, TABLE_HEADER_COLOR)
-        
-        # Text formatting
-        for paragraph in cell.paragraphs:
-            paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            for run in paragraph.runs:
-                run.font.bold = True
-                run.font.size = Pt(11)
-                run.font.color.rgb = RGBColor(255, 255, 255)  # White text
-
-def _add_form_header(table, form_name: str):
-    """Add form header row - matching brd_updater.py _add_form_header()"""
-    row = table.add_row()
-    merged_cell = row.cells[0]
-    
-    # Set text
-    merged_cell.text = form_name
-    
-    # Background color: Blue
-    _set_cell_background(merged_cell, FORM_HEADER_COLOR)
-    
-    # Text formatting
-    for paragraph in merged_cell.paragraphs:
-        paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        for run in paragraph.runs:
-            run.font.bold = True
-            run.font.size = Pt(11)
-            run.font.color.rgb = RGBColor(0, 0, 0)  # Black text
-    
-    # Cell merging (all 4 columns merged into 1)
-    if len(row.cells) >= 4:
-        merged_cell.merge(row.cells[1])
-        merged_cell.merge(row.cells[2])
-        merged_cell.merge(row.cells[3])
-
-def _add_requirement_row(table, req: dict):
-    """Add requirement data row - matching brd_updater.py _add_requirement_row()"""
-    row = table.add_row()
-    
-    # Set cell values
-    row.cells[0].text = req.get("req_id", "")
-    row.cells[1].text = req.get("section", "")
-    row.cells[2].text = req.get("description", "")
-    row.cells[3].text = req.get("status", "")
-    
-    # Formatting
-    for cell in row.cells:
-        for paragraph in cell.paragraphs:
-            # Font size
-            for run in paragraph.runs:
-                run.font.size = Pt(10)
-            # Alignment
-            paragraph.alignment = WD_ALIGN_PARAGRAPH.LEFT
-            # No background color (default white)
-
-def render_docx(template_bytes: bytes, requirements: list):
+def _run_generation(excel_bytes: bytes, template_bytes: bytes, sheet_name, filter_mode: str, timer,
+                    incremental: bool = False, fingerprint: Optional[dict] = None,
+                    column_profile: Optional[str] = None, validation: str = "off",
+                    sort_by: Optional[str] = None, group_by: Optional[str] = None,
+                    bindings: Optional[list] = None, compression: Optional[str] = None,
+                    formatting: Optional[str] = None):
     """
-    Programmatically build Word document matching brd_updater.py logic.
-    Requirements should be grouped structure: [{"form": "...", "requirements": [...]}, ...]
-    
-    IMPORTANT: This function ONLY updates the Functional Requirements table.
-    All other content (DOCUMENT INFORMATION, DOCUMENT HISTORY, etc.) is preserved.
+    Parse the workbook, validate the requirements and render the BRD.
+    Returns (groups, output stream, validation report or None); the stream
+    is None when no requirements matched the filter. With incremental,
+    template_bytes is a previously generated BRD to update. With bindings
+    (see table_bindings), every bound table is filled in one render and
+    validation covers the first binding's table.
     """
-    # Load template document - this preserves ALL content including all tables
-    doc = Document(BytesIO(template_bytes))
-    
-    logger.info(f"Loaded template with {len(doc.tables)} tables and {len(doc.paragraphs)} paragraphs")
-    
-    # Find the Functional Requirements table specifically
-    # Look for table with 4 columns and headers: Requirement ID, Section, Description, Status
-    target_table = None
-    expected_headers = ['requirement id', 'section', 'description', 'status']
-    
-    for table_idx, table in enumerate(doc.tables):
-        if len(table.rows) > 0 and len(table.columns) == 4:
-            headers = [cell.text.strip().lower() for cell in table.rows[0].cells]
-            # Check if this matches the Functional Requirements table structure
-            # Must have "requirement id" in first column and "section" in second
-            if (len(headers) >= 4 and 
-                'requirement id' in headers[0] and 
-                'section' in headers[1] and
-                'description' in headers[2] and
-                'status' in headers[3]):
-                target_table = table
-                logger.info(f"Found Functional Requirements table at index {table_idx} with headers: {headers}")
-                break
-    
-    if not target_table:
-        logger.warning("Functional Requirements table not found. Searching for insertion point...")
-        # Find where to insert (after "Functional Requirements" heading)
-        insert_pos = None
-        for i, para in enumerate(doc.paragraphs):
-            if 'functional requirements' in para.text.lower():
-                insert_pos = i + 1
-                break
-        
-        if insert_pos:
-            # Create table after the heading
-            target_table = doc.add_table(rows=1, cols=4)
-            # Set headers
-            headers = ['Requirement ID', 'Section', 'Description', 'Status']
-            for i, header in enumerate(headers):
-                target_table.rows[0].cells[i].text = header
-            logger.info("Created new Functional Requirements table")
-        else:
-            raise ValueError("Could not find 'Functional Requirements' section in template")
+    from excel_parser import parse_excel_tables, parse_excel_to_requirements
+    from docx_renderer import render_docx, render_docx_incremental, render_docx_tables
+
+    if bindings:
+        table_groups = parse_excel_tables(
+            excel_bytes, bindings, sheet_name, filter_mode, column_profile, sort_by, group_by, timer=timer,
+        )
+        requirements = table_groups[0]
+        if not any(table_groups):
+            return requirements, None, None
     else:
-        # Clear existing data rows (keep header row only)
-        # Remove rows from end to beginning to avoid index issues
-        initial_row_count = len(target_table.rows)
-        for i in range(len(target_table.rows) - 1, 0, -1):
-            target_table._element.remove(target_table.rows[i]._element)
-        logger.info(f"Cleared {initial_row_count - 1} existing data rows from Functional Requirements table")
-    
-    # Format header row
-    _format_header_row(target_table)
-    
-    # Process requirements grouped by Form
-    total_reqs = 0
-    for group in requirements:
-        if isinstance(group, dict) and "requirements" in group:
-            form_name = group.get("form", "")
-            form_reqs = group.get("requirements", [])
-            
-            if form_name and form_reqs:
-                # Add form header (merged row)
-                _add_form_header(target_table, form_name)
-                
-                # Add requirement rows
-                for req in form_reqs:
-                    _add_requirement_row(target_table, req)
-                    total_reqs += 1
-    
-    logger.info(f"Rendered Functional Requirements table with {len(target_table.rows)} rows ({total_reqs} requirements)")
-    logger.info(f"Document still has {len(doc.tables)} tables total (all other tables preserved)")
-    
-    # Save to BytesIO - this preserves ALL tables and content
-    out = BytesIO()
-    doc.save(out)
-    out.seek(0)
-    return out
+        requirements = parse_excel_to_requirements(
+            excel_bytes,
+            sheet_name=sheet_name,
+            filter_mode=filter_mode,
+            timer=timer,
+            profile=column_profile,
+            sort_by=sort_by,
+            group_by=group_by,
+        )
+        if not requirements:
+            return requirements, None, None
+
+    report = None
+    if validation != "off":
+        with timer.stage("validate"):
+            report = validate_requirements(requirements)
+        if not report["valid"]:
+            logger.warning(f"Validation issues: {report['summary']['issues']}")
+            if validation == "fail":
+                raise RequirementsInvalid(report)
+
+    logger.info(f"Parsed {len(requirements)} form groups from Excel")
+    for i, group in enumerate(requirements):
+        logger.info(f"  Group {i+1}: Form='{group.get('form')}', Requirements={len(group.get('requirements', []))}")
+
+    if bindings:
+        output_stream = render_docx_tables(
+            template_bytes,
+            [
+                (binding.headers, binding.fields, binding.form_headers, groups)
+                for binding, groups in zip(bindings, table_groups)
+            ],
+            timer=timer,
+            compression=compression,
+            formatting=formatting,
+        )
+        return [group for groups in table_groups for group in groups], output_stream, report
+    if incremental:
+        output_stream, _ = render_docx_incremental(
+            template_bytes, requirements, fingerprint, timer=timer, compression=compression, formatting=formatting,
+        )
+        return requirements, output_stream, report
+    output_stream = render_docx(
+        template_bytes, requirements, timer=timer, compression=compression, formatting=formatting,
+    )
+    return requirements, output_stream, report
+
+
+async def _generate_once(excel_bytes: bytes, template_bytes: bytes, template_label: Optional[str], sheet_name,
+                         filter_mode: str, username: str, timer, profiler,
+                         incremental: bool = False, fingerprint: Optional[dict] = None,
+                         column_profile: Optional[str] = None, validation: str = "off",
+                         sort_by: Optional[str] = None, group_by: Optional[str] = None,
+                         bindings: Optional[list] = None, compression: Optional[str] = None,
+                         formatting: Optional[str] = None):
+    """
+    Inspect, reserve memory for, wait for a scheduler slot for and run one
+    generation off the event loop.
+    Returns (row count, docx bytes or None, validation report or None);
+    bytes so coalesced callers can share it.
+    """
+    # Refuse zip bombs and oversized sheets from zip metadata alone
+    with timer.stage("inspect"):
+        excel_info = inspect_upload(excel_bytes, "xlsx", "Excel upload", sheet_name)
+        if template_label:
+            inspect_upload(template_bytes, "docx", template_label)
+
+    # Reserve memory before parsing; the estimate reads only the sheet dimension
+    estimate = (
+        estimate_generation_bytes(excel_bytes, template_bytes, sheet_name, rows=excel_info.sheet_rows)
+        if memory_guard.enabled else None
+    )
+    # Memory first, then the slot: a request waiting for memory must not hold
+    # its user's round-robin turn and capacity while it waits
+    async with memory_guard.reserve(estimate):
+        async with generation_scheduler.slot(len(excel_bytes) + len(template_bytes), username, timer):
+            async with measure_peak("generate", estimate):
+                requirements, output_stream, report = await run_in_threadpool(
+                    profiler.run, _run_generation, excel_bytes, template_bytes, sheet_name, filter_mode, timer,
+                    incremental, fingerprint, column_profile, validation, sort_by, group_by, bindings, compression,
+                    formatting,
+                )
+
+    rows = sum(len(g.get("requirements", [])) for g in requirements)
+    return rows, output_stream.getvalue() if output_stream is not None else None, report
+
+
+def _rejection_response(error: Exception) -> JSONResponse:
+    """Response for memory guard and scheduler refusals, with Retry-After when retrying can help."""
+    retry_after = getattr(error, "retry_after", None)
+    headers = {"Retry-After": str(retry_after)} if retry_after else {}
+    return JSONResponse({"error": str(error)}, status_code=error.status_code, headers=headers)
 
 
-# ------------------------------------------------------------------------------
-# /generate endpoint
-# ------------------------------------------------------------------------------
 @app.post("/generate")
 async def generate_brd(
+    request: Request,
     excel: UploadFile = File(..., description="Excel file with requirements"),
     template: UploadFile | None = File(None, description="Optional Word template; if absent, server template is used"),
     sheet_name: str | None = Form(None),
     filter_mode: str = Form("none"),  # options: "none" | "final" | "final_or_approved"
+    previous: UploadFile | None = File(None, description="Optional previously generated BRD to update incrementally"),
+    fingerprint: str | None = Form(None),  # fingerprint JSON, if the previous BRD lost its stored one
+    column_profile: str | None = Form(None),  # column mapping profile; default COLUMN_PROFILE
+    validation: str | None = Form(None),  # options: "off" | "annotate" | "fail"; default GENERATE_VALIDATION
+    sort_by: str | None = Form(None),  # options: "sheet" | "req_id" | "section"; default REQUIREMENT_SORT
+    group_by: str | None = Form(None),  # options: "form" | "section"; default REQUIREMENT_GROUP
+    table_bindings: str | None = Form(None),  # JSON spec of template tables to fill; default TABLE_BINDINGS_FILE
+    compression: str | None = Form(None),  # options: "store" | "fast" | "default" | "best"; default DOCX_COMPRESSION
+    formatting: str | None = Form(None),  # options: "direct" | "styles"; default DOCX_FORMATTING
     current_user: dict = Depends(get_current_user),  # Require authentication
 ):
     """
     Accepts the Excel (and optional Word template), generates a BRD docx with
     the Functional Requirements table updated under Section 2, and returns the file.
-    """
-    try:
-        excel_bytes = await excel.read()
 
-        # Use uploaded template if provided; else use server-side template
-        if template:
-            template_bytes = await template.read()
-        else:
-            with open("templates/template.docx", "rb") as f:
-                template_bytes = f.read()
+    With a previous BRD, only the rows of forms whose requirements changed
+    are rewritten; the template is ignored.
 
-        requirements = parse_excel_to_requirements(
-            excel_bytes,
-            sheet_name=sheet_name,
-            filter_mode=filter_mode,
-        )
+    Requirements are validated before rendering (see
+    requirements_validation): with validation "fail" any issue returns 422
+    with the report, with "annotate" the counts come back in the
+    X-Validation-Issues header.
 
-        if not requirements:
+    With table_bindings, several template tables (each matched by its
+    header text) are filled from their own sheets in one pass.
+    """
+    timer = new_timer("generate")
+    try:
+        from docx_renderer import compression_policy, formatting_mode, load_server_template, parse_fingerprint
+
+        validation = (validation or GENERATE_VALIDATION).lower()
+        if validation not in VALIDATION_MODES:
+            raise ValueError(f"validation must be one of {list(VALIDATION_MODES)}")
+
+        compression = compression_policy(compression)
+        formatting = formatting_mode(formatting)
+
+        # Checked here, before the request takes a scheduler slot or memory reservation
+        sort_by, group_by = resolve_ordering(sort_by, group_by)
+
+        bindings = parse_bindings(table_bindings) if table_bindings else DEFAULT_BINDINGS
+        if bindings and previous:
+            if table_bindings:
+                raise ValueError("table_bindings cannot be combined with a previous BRD")
+            bindings = None  # Incremental updates cover the Functional Requirements table only
+
+        previous_fingerprint = None
+        if fingerprint:
+            if not previous:
+                raise ValueError("fingerprint requires a previous BRD upload")
+            previous_fingerprint = parse_fingerprint(fingerprint)
+            if previous_fingerprint is None:
+                raise ValueError("fingerprint is not a valid BRD fingerprint")
+
+        with request_profiler(request, "generate", current_user) as profiler:
+            with timer.stage("upload_read"):
+                excel_bytes = await excel.read()
+
+                # Update a previous BRD if given; else use uploaded template; else server-side template
+                if previous:
+                    template_bytes, template_label = await previous.read(), "previous BRD"
+                elif template:
+                    template_bytes, template_label = await template.read(), "Word template"
+                else:
+                    template_bytes, template_label = load_server_template(), None
+
+            # Identical concurrent uploads share one parse + render
+            key = request_key(
+                excel_bytes, template_bytes, sheet_name, filter_mode, "incremental" if previous else "full", fingerprint,
+                column_profile, validation, sort_by, group_by, json.dumps(bindings) if bindings else None, compression,
+                formatting,
+            )
+            started = time.perf_counter()
+            (rows, output_bytes, report), leader = await generation_flights.run(
+                key,
+                lambda: _generate_once(
+                    excel_bytes, template_bytes, template_label, sheet_name, filter_mode,
+                    current_user["username"], timer, profiler, bool(previous), previous_fingerprint, column_profile,
+                    validation, sort_by, group_by, bindings, compression, formatting,
+                ),
+                # Scheduler refusals are the leader's user's queue, not the upload's fault
+                rerun_on=(GenerationQueueFull,),
+            )
+            if not leader:
+                timer.add("coalesced", time.perf_counter() - started)
+
+        if output_bytes is None:
             return JSONResponse(
                 {"message": "No requirements matched with the selected filter."},
                 status_code=422,
             )
-        
-        logger.info(f"Parsed {len(requirements)} form groups from Excel")
-        for i, group in enumerate(requirements):
-            logger.info(f"  Group {i+1}: Form='{group.get('form')}', Requirements={len(group.get('requirements', []))}")
 
-        output_stream = render_docx(template_bytes, requirements)
+        timer.record()
+        if leader:
+            record_generation("generate", rows=rows, output_bytes=len(output_bytes))
 
         filename = "Business Requirements Document - updated.docx"
+        headers = {"Content-Disposition": f'attachment; filename="{filename}"', **timer.headers(), **profiler.headers()}
+        if report is not None and not report["valid"]:
+            headers["X-Validation-Issues"] = summary_header(report)
         return StreamingResponse(
-            output_stream,
+            BytesIO(output_bytes),
             media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+            headers=headers,
         )
+    except UploadRejected as e:
+        logger.warning(f"Upload rejected before parsing: {str(e)}")
+        return JSONResponse({"error": str(e)}, status_code=e.status_code)
+    except RequirementsInvalid as e:
+        return JSONResponse({"error": str(e), "validation": e.report}, status_code=e.status_code)
+    except GenerationQueueFull as e:
+        logger.warning(f"Generation refused by scheduler: {str(e)}")
+        return _rejection_response(e)
+    except (MemoryBudgetExceeded, MemoryBudgetBusy) as e:
+        logger.warning(f"Generation refused by memory guard: {str(e)}")
+        return _rejection_response(e)
     except ValueError as ve:
         logger.exception("Validation error during generation")
         return JSONResponse({"error": str(ve)}, status_code=400)
     except Exception as e:
         logger.exception("Unexpected error during generation")
         return JSONResponse({"error": f"Internal server error: {str(e)}"}, status_code=500)
+
+
+# ------------------------------------------------------------------------------
+# /diff endpoint
+# ------------------------------------------------------------------------------
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def _run_diff(old_bytes: bytes, new_bytes: bytes, sheet_name, output: str, timer, column_profile=None):
+    """Parse both workbooks and diff them. Returns (diff, docx stream or None)."""
+    from excel_parser import parse_excel_to_requirements
+    from requirements_diff import diff_requirements, render_diff_docx
+
+    with timer.stage("parse_old"):
+        old_groups = parse_excel_to_requirements(old_bytes, sheet_name=sheet_name, profile=column_profile)
+    with timer.stage("parse_new"):
+        new_groups = parse_excel_to_requirements(new_bytes, sheet_name=sheet_name, profile=column_profile)
+    with timer.stage("diff"):
+        diff = diff_requirements(old_groups, new_groups)
+    logger.info(f"Diff: {diff['summary']}")
+    if output != "docx":
+        return diff, None
+    with timer.stage("render_table"):
+        return diff, render_diff_docx(diff)
+
+
+@app.post("/diff")
+async def diff_workbooks(
+    old: UploadFile = File(..., description="Earlier version of the requirements workbook"),
+    new: UploadFile = File(..., description="Later version of the requirements workbook"),
+    sheet_name: str | None = Form(None),
+    output: str = Form("json"),  # options: "json" | "docx"
+    column_profile: str | None = Form(None),  # column mapping profile; default COLUMN_PROFILE
+    current_user: dict = Depends(get_current_user),  # Require authentication
+):
+    """
+    Lists requirements added, removed and modified (field by field) between
+    two workbook versions, as JSON or as a docx change table.
+    """
+    if output not in ("json", "docx"):
+        return JSONResponse({"error": "output must be 'json' or 'docx'"}, status_code=400)
+    timer = new_timer("diff")
+    try:
+        with timer.stage("upload_read"):
+            old_bytes = await old.read()
+            new_bytes = await new.read()
+        with timer.stage("inspect"):
+            old_info = inspect_upload(old_bytes, "xlsx", "old workbook", sheet_name)
+            new_info = inspect_upload(new_bytes, "xlsx", "new workbook", sheet_name)
+        estimate = (
+            estimate_generation_bytes(old_bytes, sheet_name=sheet_name, rows=old_info.sheet_rows)
+            + estimate_generation_bytes(new_bytes, sheet_name=sheet_name, rows=new_info.sheet_rows)
+            if memory_guard.enabled else None
+        )
+        # Memory before the slot, as in _generate_once
+        async with memory_guard.reserve(estimate):
+            async with generation_scheduler.slot(len(old_bytes) + len(new_bytes), current_user["username"], timer):
+                async with measure_peak("diff", estimate):
+                    diff, output_stream = await run_in_threadpool(
+                        _run_diff, old_bytes, new_bytes, sheet_name, output, timer, column_profile
+                    )
+        timer.record()
+
+        if output_stream is None:
+            return JSONResponse(diff, headers=timer.headers())
+        return StreamingResponse(
+            output_stream,
+            media_type=DOCX_MEDIA_TYPE,
+            headers={"Content-Disposition": 'attachment; filename="Requirement Changes.docx"', **timer.headers()},
+        )
+    except UploadRejected as e:
+        return JSONResponse({"error": str(e)}, status_code=e.status_code)
+    except (GenerationQueueFull, MemoryBudgetExceeded, MemoryBudgetBusy) as e:
+        return _rejection_response(e)
+    except ValueError as ve:
+        return JSONResponse({"error": str(ve)}, status_code=400)
+    except Exception as e:
+        logger.exception("Unexpected error during diff")
+        return JSONResponse({"error": f"Internal server error: {str(e)}"}, status_code=500)
+
+
+# ------------------------------------------------------------------------------
+# Requirement search
+# ------------------------------------------------------------------------------
+def _build_search_index(excel_bytes: bytes, sheet_name, column_profile=None):
+    from excel_parser import parse_excel_to_requirements
+    from search_index import RequirementIndex
+
+    return RequirementIndex(parse_excel_to_requirements(excel_bytes, sheet_name=sheet_name, profile=column_profile))
+
+
+@app.post("/search/index")
+async def create_search_index(
+    excel: UploadFile = File(...),
+    sheet_name: str | None = Form(None),
+    column_profile: str | None = Form(None),  # column mapping profile; default COLUMN_PROFILE
+    current_user: dict = Depends(get_current_user),  # Require authentication
+):
+    """
+    Parse and index a workbook for searching. Returns the index_id to query
+    with GET /search/{index_id}; uploading the same workbook again reuses it.
+    """
+    from search_index import index_cache, upload_key
+
+    timer = new_timer("search-index")
+    try:
+        with timer.stage("upload_read"):
+            excel_bytes = await excel.read()
+        index_id = upload_key(excel_bytes, sheet_name, column_profile)
+        index = index_cache.get(index_id)
+        if index is None:
+            with timer.stage("inspect"):
+                excel_info = inspect_upload(excel_bytes, "xlsx", "Excel upload", sheet_name)
+            estimate = (
+                estimate_generation_bytes(excel_bytes, sheet_name=sheet_name, rows=excel_info.sheet_rows)
+                if memory_guard.enabled else None
+            )
+            async with memory_guard.reserve(estimate):
+                with timer.stage("build_index"):
+                    index = await run_in_threadpool(_build_search_index, excel_bytes, sheet_name, column_profile)
+            index_cache.put(index_id, index)
+        timer.record()
+        return JSONResponse(
+            {"index_id": index_id, "requirements": len(index), "facets": index.facets},
+            headers=timer.headers(),
+        )
+    except UploadRejected as e:
+        return JSONResponse({"error": str(e)}, status_code=e.status_code)
+    except (MemoryBudgetExceeded, MemoryBudgetBusy) as e:
+        return _rejection_response(e)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=400, headers=timer.headers())
+
+
+@app.get("/search/{index_id}")
+def search_requirements(
+    index_id: str,
+    q: str | None = None,
+    id_prefix: str | None = None,
+    id_from: str | None = None,
+    id_to: str | None = None,
+    section: str | None = None,
+    status: str | None = None,
+    form: str | None = None,
+    limit: int = 50,
+    offset: int = 0,
+    current_user: dict = Depends(get_current_user),  # Require authentication
+):
+    """Search an indexed workbook; all given criteria must match."""
+    from search_index import index_cache
+
+    index = index_cache.get(index_id)
+    if index is None:
+        return JSONResponse({"error": "Unknown or expired index_id; upload the workbook to /search/index again"}, status_code=404)
+    if limit < 0 or offset < 0:
+        return JSONResponse({"error": "limit and offset must not be negative"}, status_code=400)
+    return index.search(
+        q=q, id_prefix=id_prefix, id_from=id_from, id_to=id_to,
+        section=section, status=status, form=form, limit=min(limit, 1000), offset=offset,
+    )
+
+
+# ------------------------------------------------------------------------------
+# /sheets endpoint
+# ------------------------------------------------------------------------------
+def _describe_sheets(excel_bytes: bytes, column_profile: Optional[str] = None) -> list:
+    """
+    Name, size and detected header row of every sheet, from the workbook
+    index and the first HEADER_SCAN_ROWS rows of each sheet only.
+    """
+    from xlsx_inspect import column_letters, list_sheets, open_package, read_dimension, read_head_rows, resolve_head_rows
+
+    matcher = get_matcher(column_profile)
+    with open_package(excel_bytes) as zf:
+        sheets = list_sheets(zf)
+        head_rows = [read_head_rows(zf, part, HEADER_SCAN_ROWS) for _, part in sheets]
+        # One pass over the shared strings for the header candidates of every sheet
+        resolve_head_rows(zf, head_rows)
+
+        described = []
+        for (name, part), rows in zip(sheets, head_rows):
+            dimension = read_dimension(zf, part)
+            found, columns = matcher.detect_header_row(values for _, values in rows)
+            header = rows[found] if found is not None else None
+            described.append({
+                "name": name,
+                "rows": dimension[0] if dimension else None,
+                "columns": dimension[1] if dimension else None,
+                # 1-based sheet row number, as shown in Excel
+                "header_row": header[0] if header else None,
+                "header_columns": {
+                    field: {"column": column_letters(position + 1), "header": header[1][position]}
+                    for field, position in columns.items()
+                } if header else {},
+                "missing_columns": matcher.missing(columns),
+            })
+    return described
+
+
+@app.post("/sheets")
+async def list_workbook_sheets(
+    excel: UploadFile = File(...),
+    column_profile: str | None = Form(None),  # column mapping profile; default COLUMN_PROFILE
+    current_user: dict = Depends(get_current_user),  # Require authentication
+):
+    """
+    Sheets of a workbook with their dimensions and detected header rows, so
+    the client can pick sheet_name before generating. Sheets with a
+    header_row are ones /generate can parse.
+    """
+    timer = new_timer("sheets")
+    try:
+        with timer.stage("upload_read"):
+            excel_bytes = await excel.read()
+        with timer.stage("inspect"):
+            inspect_upload(excel_bytes, "xlsx", "Excel upload")
+        with timer.stage("describe"):
+            sheets = await run_in_threadpool(_describe_sheets, excel_bytes, column_profile)
+        timer.record()
+        return JSONResponse({"sheets": sheets}, headers=timer.headers())
+    except UploadRejected as e:
+        return JSONResponse({"error": str(e)}, status_code=e.status_code)
+    except ValueError as ve:
+        return JSONResponse({"error": str(ve)}, status_code=400, headers=timer.headers())
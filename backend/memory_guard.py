@@ -0,0 +1,242 @@
+"""
+Memory budget guard and peak-memory accounting for generation requests.
+
+parse_excel_to_requirements and render_docx hold the whole workbook and
+document in memory, so a few huge uploads at once can exhaust a small
+instance. Before parsing starts, each request gets a memory estimate. The
+estimate uses the row count from the sheet's <dimension> element and the
+upload sizes, so no cell data is read. The request then reserves that much
+of MEMORY_BUDGET_MB:
+
+- an estimate larger than the whole budget is rejected with 413;
+- otherwise the request waits (up to MEMORY_QUEUE_TIMEOUT_SECONDS) until
+  enough of the budget is free, then gets 503 with Retry-After.
+
+Separately, measure_peak() reports how much memory each generation actually
+used, by sampling process RSS (MEMORY_ACCOUNTING=rss, the default) or with
+tracemalloc (=tracemalloc, exact for Python objects but slow). RSS peaks are
+process-wide, so concurrent generations inflate each other's numbers.
+tracemalloc's peak counter is process-wide too and each measurement resets
+it, so tracemalloc-measured requests run one at a time: a diagnostic mode,
+not one for serving concurrent load.
+"""
+import asyncio
+import logging
+import os
+import threading
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from metrics import BYTE_BUCKETS, METRICS_ENABLED, REGISTRY, Counter, FunctionMetric, Histogram
+
+load_dotenv()
+
+logger = logging.getLogger("brd-utility")
+
+MEMORY_BUDGET_MB = float(os.getenv("MEMORY_BUDGET_MB", "0"))  # 0 disables the guard
+MEMORY_QUEUE_TIMEOUT_SECONDS = float(os.getenv("MEMORY_QUEUE_TIMEOUT_SECONDS", "30"))
+MEMORY_ACCOUNTING = os.getenv("MEMORY_ACCOUNTING", "rss").strip().lower()  # rss | tracemalloc | off
+
+# Estimate = base + rows * per-row + uploads * factor. Defaults were fitted to
+# the benchmark generators (about 12 KB of lxml/python-docx state per rendered row).
+MEMORY_ESTIMATE_BASE_MB = float(os.getenv("MEMORY_ESTIMATE_BASE_MB", "20"))
+MEMORY_ESTIMATE_BYTES_PER_ROW = int(os.getenv("MEMORY_ESTIMATE_BYTES_PER_ROW", "12288"))
+MEMORY_ESTIMATE_UPLOAD_FACTOR = float(os.getenv("MEMORY_ESTIMATE_UPLOAD_FACTOR", "4"))
+
+RSS_SAMPLE_INTERVAL_SECONDS = 0.02
+
+MB = 2**20
+
+
+class MemoryBudgetExceeded(Exception):
+    """The request alone would exceed the memory budget (HTTP 413)."""
+
+    status_code = 413
+
+    def __init__(self, estimate: int, budget: int):
+        self.estimate = estimate
+        self.budget = budget
+        super().__init__(
+            f"This upload is estimated to need {estimate / MB:.0f} MB, more than this server's "
+            f"{budget / MB:.0f} MB generation budget. Split the workbook or filter it down."
+        )
+
+
+class MemoryBudgetBusy(Exception):
+    """Not enough free budget within the queue timeout (HTTP 503)."""
+
+    status_code = 503
+
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__("Server is busy with other large generations, please retry shortly.")
+
+
+# ------------------------------------------------------------------------------
+# Estimation
+# ------------------------------------------------------------------------------
+def estimate_generation_bytes(
+    excel_bytes: bytes,
+    template_bytes: bytes = b"",
+    sheet_name: Optional[str] = None,
+    rows: Optional[int] = None,
+) -> int:
+    """
+    Predicted peak memory of parsing excel_bytes and rendering into
+    template_bytes. Pass rows when the sheet dimension is already known.
+    """
+    if rows is None:
+        from xlsx_inspect import estimate_sheet_rows, open_package
+
+        with open_package(excel_bytes) as zf:
+            rows = estimate_sheet_rows(zf, sheet_name)
+    return int(
+        MEMORY_ESTIMATE_BASE_MB * MB
+        + rows * MEMORY_ESTIMATE_BYTES_PER_ROW
+        + (len(excel_bytes) + len(template_bytes)) * MEMORY_ESTIMATE_UPLOAD_FACTOR
+    )
+
+
+# ------------------------------------------------------------------------------
+# Budget reservations
+# ------------------------------------------------------------------------------
+class MemoryGuard:
+    """Admits requests while the sum of their estimates fits the budget."""
+
+    def __init__(self, budget_bytes: int, queue_timeout: float = MEMORY_QUEUE_TIMEOUT_SECONDS):
+        self.budget_bytes = budget_bytes
+        self.queue_timeout = queue_timeout
+        self.reserved_bytes = 0
+        self._condition: Optional[asyncio.Condition] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget_bytes > 0
+
+    def _get_condition(self) -> asyncio.Condition:
+        # Created lazily so it binds to the running event loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    @asynccontextmanager
+    async def reserve(self, estimate: int):
+        if not self.enabled:
+            yield
+            return
+        if estimate > self.budget_bytes:
+            REJECTIONS.inc(reason="too_large")
+            raise MemoryBudgetExceeded(estimate, self.budget_bytes)
+
+        condition = self._get_condition()
+        async with condition:
+            try:
+                await asyncio.wait_for(
+                    condition.wait_for(lambda: self.reserved_bytes + estimate <= self.budget_bytes),
+                    timeout=self.queue_timeout,
+                )
+            except asyncio.TimeoutError:
+                REJECTIONS.inc(reason="busy")
+                raise MemoryBudgetBusy(retry_after=max(1, int(self.queue_timeout)))
+            self.reserved_bytes += estimate
+        try:
+            yield
+        finally:
+            async with condition:
+                self.reserved_bytes -= estimate
+                condition.notify_all()
+
+
+memory_guard = MemoryGuard(int(MEMORY_BUDGET_MB * MB))
+
+
+# ------------------------------------------------------------------------------
+# Peak accounting
+# ------------------------------------------------------------------------------
+def _current_rss() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class PeakMemory:
+    """Result holder for measure_peak(): peak_bytes above the starting level."""
+
+    def __init__(self, method: str):
+        self.method = method
+        self.peak_bytes: Optional[int] = None
+
+
+_tracemalloc_lock: Optional[asyncio.Lock] = None
+
+
+def _get_tracemalloc_lock() -> asyncio.Lock:
+    # Created lazily so it binds to the running event loop
+    global _tracemalloc_lock
+    if _tracemalloc_lock is None:
+        _tracemalloc_lock = asyncio.Lock()
+    return _tracemalloc_lock
+
+
+@asynccontextmanager
+async def measure_peak(endpoint: str, estimate: Optional[int] = None):
+    """Measure the peak memory growth of the body, then log and record it."""
+    result = PeakMemory(MEMORY_ACCOUNTING)
+    if MEMORY_ACCOUNTING == "tracemalloc":
+        import tracemalloc
+
+        # One measurement at a time: another request's start/stop or
+        # reset_peak() would corrupt this one's peak
+        async with _get_tracemalloc_lock():
+            started_here = not tracemalloc.is_tracing()
+            if started_here:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            try:
+                yield result
+            finally:
+                result.peak_bytes = tracemalloc.get_traced_memory()[1] - baseline
+                if started_here:
+                    tracemalloc.stop()
+                _report(endpoint, result, estimate)
+    elif MEMORY_ACCOUNTING == "rss" and _current_rss() is not None:
+        baseline = _current_rss()
+        peak = [baseline]
+        done = threading.Event()
+
+        def sample():
+            while not done.wait(RSS_SAMPLE_INTERVAL_SECONDS):
+                peak[0] = max(peak[0], _current_rss() or 0)
+
+        sampler = threading.Thread(target=sample, name="brd-rss-sampler", daemon=True)
+        sampler.start()
+        try:
+            yield result
+        finally:
+            done.set()
+            sampler.join()
+            result.peak_bytes = max(peak[0], _current_rss() or 0) - baseline
+            _report(endpoint, result, estimate)
+    else:
+        yield result
+
+
+def _report(endpoint: str, result: PeakMemory, estimate: Optional[int]) -> None:
+    estimate_text = f" (estimate {estimate / MB:.1f} MB)" if estimate else ""
+    logger.info(f"{endpoint} peak memory: +{result.peak_bytes / MB:.1f} MB {result.method}{estimate_text}")
+    if METRICS_ENABLED:
+        PEAK_MEMORY.observe(max(0, result.peak_bytes), endpoint=endpoint)
+
+
+PEAK_MEMORY = REGISTRY.register(Histogram(
+    "brd_generation_peak_memory_bytes", "Peak memory growth per generation", BYTE_BUCKETS + (500_000_000, 1_000_000_000),
+    ("endpoint",)))
+REJECTIONS = REGISTRY.register(Counter(
+    "brd_memory_rejections_total", "Requests rejected by the memory budget guard", ("reason",)))
+REGISTRY.register(FunctionMetric(
+    "brd_memory_reserved_bytes", "Memory currently reserved by admitted generations", lambda: memory_guard.reserved_bytes))
@@ -0,0 +1,224 @@
+"""
+Lightweight request metrics: per-stage timers, a Server-Timing header and a
+Prometheus text-format registry served at /metrics.
+
+No client library is required. Set METRICS_ENABLED=false to turn everything
+off; handlers then get NULL_TIMER, whose stage() returns a shared no-op
+context manager, and the record_* helpers return immediately.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Seconds; covers sub-millisecond stages up to multi-minute generations
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+ROW_BUCKETS = (10, 100, 500, 1000, 5000, 10000, 50000, 100000, 500000)
+BYTE_BUCKETS = (10_000, 100_000, 1_000_000, 5_000_000, 10_000_000, 50_000_000, 100_000_000)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, buckets: Iterable[float], labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        # key -> [bucket counts..., +Inf count, sum]
+        self._values: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class FunctionMetric:
+    """A gauge or counter whose value is read from a callback at scrape time."""
+
+    def __init__(self, name: str, documentation: str, fn: Callable[[], float], kind: str = "gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.fn = fn
+        self.kind = kind
+
+    def collect(self) -> List[str]:
+        value = self.fn()
+        if value is None:
+            return []
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", f"{self.name} {_format_value(value)}"]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.register(Counter(
+    "brd_requests_total", "HTTP requests by route, method and status code", ("route", "method", "status")))
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    "brd_request_duration_seconds", "HTTP request latency by route", DURATION_BUCKETS, ("route",)))
+STAGE_DURATION = REGISTRY.register(Histogram(
+    "brd_stage_duration_seconds", "Generation pipeline stage latency", DURATION_BUCKETS, ("endpoint", "stage")))
+REQUIREMENT_ROWS = REGISTRY.register(Histogram(
+    "brd_requirement_rows", "Requirements parsed per request", ROW_BUCKETS, ("endpoint",)))
+OUTPUT_BYTES = REGISTRY.register(Histogram(
+    "brd_output_bytes", "Size of generated documents in bytes", BYTE_BUCKETS, ("endpoint",)))
+
+
+# ------------------------------------------------------------------------------
+# Stage timers
+# ------------------------------------------------------------------------------
+class StageTimer:
+    """Collects named stage durations for one request."""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.stages: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    def add(self, name: str, seconds: float) -> None:
+        """Record a stage timed elsewhere."""
+        self.stages.append((name, seconds))
+
+    def record(self) -> None:
+        """Feed the collected stages into the stage histogram."""
+        for name, seconds in self.stages:
+            STAGE_DURATION.observe(seconds, endpoint=self.endpoint, stage=name)
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, durations in milliseconds."""
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages)
+
+    def headers(self) -> Dict[str, str]:
+        return {"Server-Timing": self.server_timing()} if self.stages else {}
+
+
+class _NullTimer:
+    """Stand-in used when metrics are disabled: every call is a no-op."""
+
+    endpoint = ""
+    stages: List[Tuple[str, float]] = []
+    _noop = nullcontext()
+
+    def stage(self, name: str):
+        return self._noop
+
+    def add(self, name: str, seconds: float) -> None:
+        pass
+
+    def record(self) -> None:
+        pass
+
+    def server_timing(self) -> str:
+        return ""
+
+    def headers(self) -> Dict[str, str]:
+        return {}
+
+
+NULL_TIMER = _NullTimer()
+
+
+def new_timer(endpoint: str):
+    return StageTimer(endpoint) if METRICS_ENABLED else NULL_TIMER
+
+
+def record_request(route: str, method: str, status: int, seconds: float) -> None:
+    if not METRICS_ENABLED:
+        return
+    REQUESTS.inc(route=route, method=method, status=status)
+    REQUEST_DURATION.observe(seconds, route=route)
+
+
+def record_generation(endpoint: str, rows: int, output_bytes: int = None) -> None:
+    if not METRICS_ENABLED:
+        return
+    REQUIREMENT_ROWS.observe(rows, endpoint=endpoint)
+    if output_bytes is not None:
+        OUTPUT_BYTES.observe(output_bytes, endpoint=endpoint)
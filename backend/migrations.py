@@ -0,0 +1,100 @@
+"""
+Versioned schema migrations for the user store.
+
+Each migration has a version number and DDL per storage backend. Applied
+versions are recorded in a `schema_version` table, so startup costs one
+`SELECT MAX(version)` once the schema is current and only pending migrations
+run after a deploy.
+
+Migrations must be idempotent (IF NOT EXISTS guards): databases created
+before versioning already have the users table, and two instances booting
+at the same time may both try to apply the same version.
+"""
+import logging
+from typing import Dict, List, NamedTuple
+
+logger = logging.getLogger("brd-utility")
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    sql: Dict[str, str]  # backend name -> DDL script
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        version=1,
+        description="Create users table",
+        sql={
+            "sqlserver": """
+            IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[users]') AND type in (N'U'))
+            BEGIN
+                CREATE TABLE [dbo].[users] (
+                    [id] INT IDENTITY(1,1) PRIMARY KEY,
+                    [username] NVARCHAR(100) NOT NULL UNIQUE,
+                    [email] NVARCHAR(255) NOT NULL UNIQUE,
+                    [password_hash] NVARCHAR(255) NOT NULL,
+                    [full_name] NVARCHAR(255),
+                    [created_at] DATETIME2 DEFAULT GETDATE(),
+                    [updated_at] DATETIME2 DEFAULT GETDATE()
+                );
+                CREATE INDEX IX_users_username ON [dbo].[users]([username]);
+                CREATE INDEX IX_users_email ON [dbo].[users]([email]);
+            END
+            """,
+            "sqlite": """
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL UNIQUE COLLATE NOCASE,
+                email TEXT NOT NULL UNIQUE COLLATE NOCASE,
+                password_hash TEXT NOT NULL,
+                full_name TEXT,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE INDEX IF NOT EXISTS IX_users_username ON users(username);
+            CREATE INDEX IF NOT EXISTS IX_users_email ON users(email);
+            """,
+        },
+    ),
+]
+
+LATEST_VERSION = max(m.version for m in MIGRATIONS)
+
+
+def pending_migrations(current_version: int) -> List[Migration]:
+    """Migrations newer than current_version, in version order."""
+    return sorted((m for m in MIGRATIONS if m.version > current_version), key=lambda m: m.version)
+
+
+def run_migrations(repository, apply: bool = True) -> int:
+    """
+    Bring the repository's schema up to LATEST_VERSION.
+
+    With apply=False only the version check runs and a warning is logged when
+    the schema is behind. Returns the schema version after the call.
+    """
+    current = repository.get_schema_version()
+    pending = pending_migrations(current)
+    if not pending:
+        logger.info(f"Database schema is current (version {current})")
+        return current
+
+    if not apply:
+        logger.warning(
+            f"Database schema is at version {current}, latest is {LATEST_VERSION}; "
+            f"{len(pending)} migration(s) pending and DB_INIT_MODE=check does not apply them"
+        )
+        return current
+
+    for migration in pending:
+        if migration.sql.get(repository.name) is None:
+            raise ValueError(f"Migration {migration.version} has no DDL for backend '{repository.name}'")
+        applied = repository.apply_migration(migration)
+        if applied:
+            logger.info(f"Applied migration {migration.version}: {migration.description}")
+        else:
+            logger.info(f"Migration {migration.version} was already applied by another instance")
+        current = migration.version
+    return current
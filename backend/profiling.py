@@ -0,0 +1,149 @@
+"""
+Opt-in cProfile capture of single /generate or /test-parse requests.
+
+Two switches must both be on before anything is profiled:
+
+- PROFILING_ENABLED=true on the server, and
+- an `X-Profile: 1` request header from a user listed in PROFILE_ADMIN_USERS.
+
+Profiles are written to PROFILES_DIR as `<id>.prof` (load with pstats or
+snakeviz) plus `<id>.txt` with the top functions by cumulative time. Only
+the newest PROFILES_MAX_FILES captures are kept. The profile id is returned
+in the X-Profile-Id response header.
+
+The endpoints run parse/render in a worker thread, and cProfile only sees
+the thread it is enabled in, so the profiled work is passed through
+profiler.run(fn, *args) inside that thread. The capture slot is held from
+`with request_profiler(...)` until the block exits.
+
+With PROFILING_ENABLED=false, request_profiler() returns a shared no-op
+context manager after a single flag check.
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger("brd-utility")
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILE_ADMIN_USERS = {u.strip().lower() for u in os.getenv("PROFILE_ADMIN_USERS", "").split(",") if u.strip()}
+PROFILES_DIR = Path(os.getenv("PROFILES_DIR", "profiles"))
+PROFILES_MAX_FILES = int(os.getenv("PROFILES_MAX_FILES", "20"))
+PROFILE_HEADER = "X-Profile"
+PROFILE_SUMMARY_LINES = 60
+
+# cProfile cannot run two profilers at once in one thread, and overlapping
+# captures would attribute each other's work anyway: one capture at a time.
+_capture_lock = threading.Lock()
+
+
+class _NullProfiler:
+    profile_id = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+    def headers(self) -> Dict[str, str]:
+        return {}
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+class RequestProfiler:
+    """Profiles the work passed to run() and saves the result when the block exits."""
+
+    def __init__(self, endpoint: str, username: str):
+        safe_user = re.sub(r"[^A-Za-z0-9_.-]", "_", username)
+        self.profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() // 1000 % 10**6:06d}-{endpoint}-{safe_user}"
+        self.endpoint = endpoint
+        self._profiler = cProfile.Profile()
+        self._started = 0.0
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self._started
+        try:
+            self._save(elapsed)
+        except Exception as e:
+            logger.error(f"Failed to save profile {self.profile_id}: {str(e)}")
+        finally:
+            _capture_lock.release()
+        return False
+
+    def run(self, fn, *args, **kwargs):
+        """Call fn with profiling enabled in the calling thread."""
+        self._profiler.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._profiler.disable()
+
+    def headers(self) -> Dict[str, str]:
+        return {"X-Profile-Id": self.profile_id}
+
+    def _save(self, elapsed: float) -> None:
+        PROFILES_DIR.mkdir(parents=True, exist_ok=True)
+        self._profiler.dump_stats(str(PROFILES_DIR / f"{self.profile_id}.prof"))
+
+        summary = io.StringIO()
+        summary.write(f"{self.endpoint} profiled for {elapsed:.3f}s\n\n")
+        pstats.Stats(self._profiler, stream=summary).sort_stats("cumulative").print_stats(PROFILE_SUMMARY_LINES)
+        (PROFILES_DIR / f"{self.profile_id}.txt").write_text(summary.getvalue())
+        logger.info(f"Saved profile {self.profile_id} ({elapsed:.2f}s) to {PROFILES_DIR}")
+        _enforce_retention()
+
+
+def _enforce_retention() -> None:
+    profiles = sorted(PROFILES_DIR.glob("*.prof"), key=lambda p: p.stat().st_mtime)
+    for stale in profiles[:max(0, len(profiles) - PROFILES_MAX_FILES)]:
+        stale.unlink(missing_ok=True)
+        stale.with_suffix(".txt").unlink(missing_ok=True)
+
+
+def _username_from_request(request) -> Optional[str]:
+    """Username from the bearer token, for endpoints without an auth dependency."""
+    from auth import decode_token
+
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = decode_token(token)
+    return payload.get("sub") if payload else None
+
+
+def request_profiler(request, endpoint: str, current_user: Optional[dict] = None):
+    """Return a RequestProfiler if this request asked for (and may have) a profile."""
+    if not PROFILING_ENABLED:
+        return NULL_PROFILER
+    if request.headers.get(PROFILE_HEADER, "").lower() not in ("1", "true", "yes"):
+        return NULL_PROFILER
+
+    username = current_user["username"] if current_user else _username_from_request(request)
+    if not username or username.lower() not in PROFILE_ADMIN_USERS:
+        logger.warning(f"Ignoring {PROFILE_HEADER} header on {endpoint} from non-admin user {username!r}")
+        return NULL_PROFILER
+    if not _capture_lock.acquire(blocking=False):
+        logger.warning(f"Skipping profile of {endpoint}: another capture is in progress")
+        return NULL_PROFILER
+    return RequestProfiler(endpoint, username)
@@ -0,0 +1,119 @@
+"""
+Revision diff between two parsed requirement workbooks.
+
+Both versions are flattened and indexed by req_id in dicts, so the
+comparison is a single linear pass whatever the order of rows. A
+requirement is "modified" when any of DIFF_FIELDS differs; "moved" between
+forms counts as a change of its form field.
+
+The result is plain JSON-ready data; render_diff_docx() turns it into a
+change table using the same table formatting as the BRD.
+"""
+import logging
+from io import BytesIO
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger("brd-utility")
+
+DIFF_FIELDS = ("form", "section", "description", "status")
+
+
+def _index(groups: Iterable[dict]) -> Dict[str, dict]:
+    """req_id -> requirement; for duplicated ids the first occurrence wins."""
+    index: Dict[str, dict] = {}
+    duplicates = 0
+    for group in groups:
+        for req in group.get("requirements", []):
+            if req["req_id"] in index:
+                duplicates += 1
+                continue
+            index[req["req_id"]] = req
+    if duplicates:
+        logger.warning(f"Diff ignored {duplicates} rows with duplicate req_id")
+    return index
+
+
+def diff_requirements(old_groups: List[dict], new_groups: List[dict]) -> dict:
+    """
+    Compare two parse_excel_to_requirements() results. Added and modified
+    requirements are listed in new-workbook order, removed ones in
+    old-workbook order.
+    """
+    old = _index(old_groups)
+    new = _index(new_groups)
+
+    added, modified = [], []
+    unchanged = 0
+    for req_id, req in new.items():
+        before = old.get(req_id)
+        if before is None:
+            added.append(req)
+            continue
+        changes = {
+            field: {"old": before.get(field, ""), "new": req.get(field, "")}
+            for field in DIFF_FIELDS
+            if before.get(field, "") != req.get(field, "")
+        }
+        if changes:
+            modified.append({"req_id": req_id, "form": req.get("form", ""), "changes": changes})
+        else:
+            unchanged += 1
+    removed = [req for req_id, req in old.items() if req_id not in new]
+
+    return {
+        "summary": {
+            "added": len(added),
+            "removed": len(removed),
+            "modified": len(modified),
+            "unchanged": unchanged,
+        },
+        "added": added,
+        "removed": removed,
+        "modified": modified,
+    }
+
+
+def render_diff_docx(diff: dict, compression: Optional[str] = None) -> BytesIO:
+    """A standalone .docx with a summary and a change table grouped by change type."""
+    from docx import Document  # type: ignore
+
+    from docx_renderer import _StyledRows, _format_header_row, save_docx
+
+    doc = Document()
+    doc.add_heading("Requirement Changes", level=1)
+    summary = diff["summary"]
+    doc.add_paragraph(
+        f"{summary['added']} added, {summary['removed']} removed, "
+        f"{summary['modified']} modified, {summary['unchanged']} unchanged."
+    )
+
+    table = doc.add_table(rows=1, cols=4)
+    table.style = "Table Grid"
+    for cell, header in zip(table.rows[0].cells, ("Requirement ID", "Form", "Change", "Details")):
+        cell.text = header
+    _format_header_row(table)
+
+    # Rows are copies of the BRD's styled prototype rows, so a diff of any
+    # size costs one deepcopy per row; the four columns map onto the
+    # req_id/section/description/status slots
+    rows = _StyledRows(table)
+
+    def add_row(req_id: str, form: str, change: str, details: str):
+        rows.add_requirement({"req_id": req_id, "section": form, "description": change, "status": details})
+
+    sections = (
+        ("Added", diff["added"], lambda r: add_row(r["req_id"], r.get("form", ""), "Added", r.get("description", ""))),
+        ("Removed", diff["removed"], lambda r: add_row(r["req_id"], r.get("form", ""), "Removed", r.get("description", ""))),
+        ("Modified", diff["modified"], lambda m: add_row(
+            m["req_id"], m["form"], "Modified",
+            "\n".join(f"{field}: {c['old']} → {c['new']}" for field, c in m["changes"].items()),
+        )),
+    )
+    for title, entries, add in sections:
+        if not entries:
+            continue
+        rows.add_form_header(f"{title} ({len(entries)})")
+        for entry in entries:
+            add(entry)
+
+    return save_docx(doc, compression)
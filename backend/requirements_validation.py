@@ -0,0 +1,89 @@
+"""
+Data-quality checks on parsed requirements, run before rendering.
+
+validate_requirements() walks the parse_excel_to_requirements() result
+once, with dict lookups for req_ids and set lookups for statuses, and
+reports:
+
+- duplicate_req_id: req_ids used by more than one row
+- empty_description: requirements with no description
+- unknown_status: status not in KNOWN_STATUSES (case-insensitive; blank counts)
+- missing_form: requirements above the first Form value
+
+/generate runs it in the mode given by validation (default
+GENERATE_VALIDATION): "fail" refuses to render when there are issues (422
+with the report), "annotate" renders anyway and summarizes the issues in
+the X-Validation-Issues header, "off" skips the checks.
+"""
+import os
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+KNOWN_STATUSES = frozenset(
+    s.strip().lower() for s in os.getenv("KNOWN_STATUSES", "draft,in review,approved,final,deferred").split(",")
+    if s.strip()
+)
+GENERATE_VALIDATION = os.getenv("GENERATE_VALIDATION", "annotate").lower()
+VALIDATION_MODES = ("off", "annotate", "fail")
+
+CHECKS = ("duplicate_req_id", "empty_description", "unknown_status", "missing_form")
+
+
+class RequirementsInvalid(Exception):
+    """Validation found issues and the request asked to fail fast (HTTP 422)."""
+
+    status_code = 422
+
+    def __init__(self, report: dict):
+        self.report = report
+        counts = ", ".join(f"{check}: {count}" for check, count in report["summary"]["issues"].items() if count)
+        super().__init__(f"Requirements failed validation ({counts})")
+
+
+def validate_requirements(groups: List[dict]) -> dict:
+    """Structured report of the CHECKS over every requirement in groups."""
+    first_form: Dict[str, str] = {}
+    duplicate_forms: Dict[str, List[str]] = {}  # req_id -> form of every row using it
+    empty_description, unknown_status, missing_form = [], [], []
+
+    total = 0
+    for group in groups:
+        for req in group.get("requirements", []):
+            total += 1
+            req_id = req["req_id"]
+            if req_id in first_form:
+                duplicate_forms.setdefault(req_id, [first_form[req_id]]).append(req.get("form", ""))
+            else:
+                first_form[req_id] = req.get("form", "")
+            if not req.get("description"):
+                empty_description.append(req_id)
+            if req.get("status", "").lower() not in KNOWN_STATUSES:
+                unknown_status.append({"req_id": req_id, "status": req.get("status", "")})
+            if not req.get("form"):
+                missing_form.append(req_id)
+
+    duplicates = [
+        {"req_id": req_id, "count": len(forms), "forms": forms} for req_id, forms in duplicate_forms.items()
+    ]
+    issues = {
+        "duplicate_req_id": duplicates,
+        "empty_description": empty_description,
+        "unknown_status": unknown_status,
+        "missing_form": missing_form,
+    }
+    return {
+        "valid": not any(issues.values()),
+        "summary": {
+            "requirements": total,
+            "issues": {check: len(found) for check, found in issues.items()},
+        },
+        "issues": issues,
+    }
+
+
+def summary_header(report: dict) -> str:
+    """Compact "check=count" list of the checks that found something, for a response header."""
+    return ", ".join(f"{check}={count}" for check, count in report["summary"]["issues"].items() if count)
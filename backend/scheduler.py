@@ -0,0 +1,226 @@
+"""
+Admission control for generation work.
+
+Every /generate that actually parses and renders (coalesced followers do
+not) takes slots from a fixed capacity of GENERATION_CONCURRENCY. A
+request's cost is its upload size in GENERATION_COST_UNIT_MB units,
+between 1 and the whole capacity, so one huge workbook holds back several
+small ones instead of running beside them.
+
+Requests that do not fit wait in per-user FIFO queues (keyed on the
+username from get_current_user), served round-robin: after one of a user's
+requests is started, that user goes to the back of the rotation. A user
+batch-generating dozens of BRDs therefore delays another user's single
+request by at most one of their generations, not by their whole backlog.
+
+- if GENERATION_QUEUE_LIMIT requests are already waiting in total, or
+  GENERATION_USER_QUEUE_LIMIT from the same user, a new one is refused at
+  once with 429;
+- a request that waits longer than GENERATION_QUEUE_TIMEOUT_SECONDS is
+  refused with 429.
+
+Both carry Retry-After, estimated from recent service times. Queue depth,
+slots in use and queue wait are exported as metrics.
+
+Requests reserve their memory budget (memory_guard) before queueing here,
+so one waiting for memory never holds its user's turn or any capacity.
+
+GENERATION_CONCURRENCY=0 disables the scheduler.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque
+
+from dotenv import load_dotenv
+
+from metrics import DURATION_BUCKETS, REGISTRY, Counter, FunctionMetric, Histogram
+
+load_dotenv()
+
+GENERATION_CONCURRENCY = int(os.getenv("GENERATION_CONCURRENCY", str(os.cpu_count() or 2)))
+GENERATION_QUEUE_LIMIT = int(os.getenv("GENERATION_QUEUE_LIMIT", "32"))
+GENERATION_USER_QUEUE_LIMIT = int(os.getenv("GENERATION_USER_QUEUE_LIMIT", "8"))
+GENERATION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("GENERATION_QUEUE_TIMEOUT_SECONDS", "60"))
+GENERATION_COST_UNIT_MB = float(os.getenv("GENERATION_COST_UNIT_MB", "5"))
+
+# Weight of the newest sample in the moving average of seconds held per slot
+SERVICE_TIME_SMOOTHING = 0.2
+
+MB = 2**20
+
+
+class GenerationQueueFull(Exception):
+    """No capacity now and no room (or time) to wait for it (HTTP 429)."""
+
+    status_code = 429
+
+    def __init__(self, message: str, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
+class _Waiter:
+    __slots__ = ("cost", "future")
+
+    def __init__(self, cost: int, future: asyncio.Future):
+        self.cost = cost
+        self.future = future
+
+
+class GenerationScheduler:
+    """Bounded-concurrency admission with bounded, per-user round-robin queues."""
+
+    def __init__(
+        self,
+        capacity: int,
+        queue_limit: int = GENERATION_QUEUE_LIMIT,
+        user_queue_limit: int = GENERATION_USER_QUEUE_LIMIT,
+        queue_timeout: float = GENERATION_QUEUE_TIMEOUT_SECONDS,
+        cost_unit_bytes: int = int(GENERATION_COST_UNIT_MB * MB),
+    ):
+        self.capacity = capacity
+        self.queue_limit = queue_limit
+        self.user_queue_limit = user_queue_limit
+        self.queue_timeout = queue_timeout
+        self.cost_unit_bytes = max(1, cost_unit_bytes)
+        self.in_use = 0
+        # username -> that user's waiters; dict order is the round-robin rotation
+        self._queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self._waiting = 0
+        self._seconds_per_slot = 1.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._waiting
+
+    @property
+    def queued_users(self) -> int:
+        return len(self._queues)
+
+    def cost_of(self, upload_bytes: int) -> int:
+        return max(1, min(self.capacity, math.ceil(upload_bytes / self.cost_unit_bytes)))
+
+    def retry_after(self) -> int:
+        """Rough seconds until the current queue has drained."""
+        queued = sum(w.cost for queue in self._queues.values() for w in queue) + self.in_use
+        return max(1, math.ceil(self._seconds_per_slot * queued / self.capacity))
+
+    def _dispatch(self) -> None:
+        # Start the head request of the user at the front of the rotation. If it
+        # does not fit yet, wait for capacity rather than letting smaller
+        # requests from other users overtake it indefinitely.
+        while self._queues:
+            user, queue = next(iter(self._queues.items()))
+            waiter = queue[0]
+            if self.in_use + waiter.cost > self.capacity:
+                return
+            self._remove(user, waiter)
+            if user in self._queues:
+                self._queues.move_to_end(user)
+            self.in_use += waiter.cost
+            waiter.future.set_result(None)
+
+    def _remove(self, user: str, waiter: _Waiter) -> None:
+        queue = self._queues.get(user)
+        if queue is None or waiter not in queue:
+            return
+        queue.remove(waiter)
+        self._waiting -= 1
+        if not queue:
+            del self._queues[user]
+
+    async def _acquire(self, cost: int, user: str) -> None:
+        if not self._queues and self.in_use + cost <= self.capacity:
+            self.in_use += cost
+            return
+        queue = self._queues.get(user)
+        if queue is not None and len(queue) >= self.user_queue_limit:
+            REJECTIONS.inc(reason="user_queue_full")
+            raise GenerationQueueFull(
+                f"You already have {len(queue)} generations queued, please wait for them to finish.",
+                self.retry_after(),
+            )
+        if self._waiting >= self.queue_limit:
+            REJECTIONS.inc(reason="queue_full")
+            raise GenerationQueueFull(
+                f"Server is busy with {self._waiting} queued generations, please retry shortly.",
+                self.retry_after(),
+            )
+
+        waiter = _Waiter(cost, asyncio.get_running_loop().create_future())
+        self._queues.setdefault(user, deque()).append(waiter)
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if self._granted(waiter):
+                return  # Granted right at the deadline
+            self._abandon(user, waiter)
+            REJECTIONS.inc(reason="timeout")
+            raise GenerationQueueFull(
+                f"Waited {self.queue_timeout:.0f}s without a free generation slot, please retry shortly.",
+                self.retry_after(),
+            )
+        except BaseException:
+            # Client went away while queued
+            if self._granted(waiter):
+                self._release(cost)
+            else:
+                self._abandon(user, waiter)
+            raise
+
+    @staticmethod
+    def _granted(waiter: _Waiter) -> bool:
+        return waiter.future.done() and not waiter.future.cancelled()
+
+    def _abandon(self, user: str, waiter: _Waiter) -> None:
+        waiter.future.cancel()
+        self._remove(user, waiter)
+        # The abandoned request may have been blocking the rotation
+        self._dispatch()
+
+    def _release(self, cost: int) -> None:
+        self.in_use -= cost
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, upload_bytes: int, user: str = "", timer=None):
+        """Hold generation capacity for the body; the wait is timed as stage 'queue'."""
+        if not self.enabled:
+            yield
+            return
+        cost = self.cost_of(upload_bytes)
+        waited = time.perf_counter()
+        await self._acquire(cost, user.lower())
+        started = time.perf_counter()
+        QUEUE_WAIT.observe(started - waited)
+        if timer is not None:
+            timer.add("queue", started - waited)
+        try:
+            yield
+        finally:
+            held = time.perf_counter() - started
+            self._seconds_per_slot += SERVICE_TIME_SMOOTHING * (held / cost - self._seconds_per_slot)
+            self._release(cost)
+
+
+generation_scheduler = GenerationScheduler(GENERATION_CONCURRENCY)
+
+QUEUE_WAIT = REGISTRY.register(Histogram(
+    "brd_generation_queue_wait_seconds", "Time generations waited for a scheduler slot", DURATION_BUCKETS))
+REJECTIONS = REGISTRY.register(Counter(
+    "brd_generation_rejections_total", "Generations refused by the scheduler", ("reason",)))
+REGISTRY.register(FunctionMetric(
+    "brd_generation_queue_depth", "Generations waiting for a scheduler slot", lambda: generation_scheduler.queue_depth))
+REGISTRY.register(FunctionMetric(
+    "brd_generation_queued_users", "Users with generations waiting", lambda: generation_scheduler.queued_users))
+REGISTRY.register(FunctionMetric(
+    "brd_generation_slots_in_use", "Scheduler capacity held by running generations", lambda: generation_scheduler.in_use))
@@ -0,0 +1,183 @@
+"""
+In-memory search over the requirements of a parsed workbook.
+
+Indexes are built once per upload and cached by a hash of the workbook
+bytes, sheet name and column profile, so reviewers can run many queries
+against a workbook without re-uploading or re-parsing it:
+
+- description keywords: inverted index token -> row positions
+- req_id prefix: req_ids sorted once as lowercase text, queried with bisect
+- req_id range: req_ids sorted once in natural order (PRJ_01.2 before
+  PRJ_01.10, as sort_by=req_id orders them), queried with bisect
+- section, status, form: exact-match (case-insensitive) value -> positions
+
+Query terms are ANDed. Results come back in sheet order with facet counts
+by status and form over the whole match set.
+
+The cache keeps SEARCH_CACHE_MAX_ENTRIES indexes for SEARCH_CACHE_TTL_SECONDS
+after their last use.
+"""
+import bisect
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from column_mapping import natural_key
+
+load_dotenv()
+
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "1800"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "8"))
+
+FACET_FIELDS = ("status", "form")
+EXACT_FIELDS = ("section", "status", "form")
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def upload_key(excel_bytes: bytes, sheet_name: Optional[str] = None, profile: Optional[str] = None) -> str:
+    digest = hashlib.sha256(excel_bytes)
+    digest.update(b"\x00" + (sheet_name or "").encode())
+    digest.update(b"\x00" + (profile or "").encode())
+    return digest.hexdigest()[:32]
+
+
+class RequirementIndex:
+    """Read-only indexes over a flat list of requirement dicts."""
+
+    def __init__(self, groups: List[dict]):
+        self.records = [req for group in groups for req in group.get("requirements", [])]
+        self.tokens: Dict[str, List[int]] = {}
+        self.exact: Dict[str, Dict[str, List[int]]] = {field: {} for field in EXACT_FIELDS}
+
+        for position, req in enumerate(self.records):
+            # Positions are appended in order, so every posting list stays sorted
+            for token in set(tokenize(req.get("description", ""))):
+                self.tokens.setdefault(token, []).append(position)
+            for field in EXACT_FIELDS:
+                self.exact[field].setdefault(req.get(field, "").lower(), []).append(position)
+
+        # Ids sharing a text prefix ("prj_01" covers "prj_010") are only
+        # contiguous in text order; ranges compare ids the way the parser sorts
+        id_order = sorted(range(len(self.records)), key=lambda p: self.records[p]["req_id"].lower())
+        self.sorted_ids = [self.records[p]["req_id"].lower() for p in id_order]
+        self.sorted_positions = id_order
+        natural_ids = [natural_key(req["req_id"]) for req in self.records]
+        natural_order = sorted(range(len(self.records)), key=natural_ids.__getitem__)
+        self.natural_ids = [natural_ids[p] for p in natural_order]
+        self.natural_positions = natural_order
+        self.facets = self._facet_counts(range(len(self.records)))
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _facet_counts(self, positions) -> Dict[str, Dict[str, int]]:
+        counts = {field: Counter() for field in FACET_FIELDS}
+        for position in positions:
+            req = self.records[position]
+            for field in FACET_FIELDS:
+                counts[field][req.get(field, "")] += 1
+        return {field: dict(counter.most_common()) for field, counter in counts.items()}
+
+    def _id_prefix(self, prefix: str) -> List[int]:
+        # Every id with the prefix sorts between the prefix and prefix + U+FFFF
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self.sorted_ids, prefix)
+        end = bisect.bisect_left(self.sorted_ids, prefix + "\uffff")
+        return self.sorted_positions[start:end]
+
+    def _id_range(self, low: Optional[str], high: Optional[str]) -> List[int]:
+        """Positions of ids from low to high inclusive, in natural order."""
+        start = bisect.bisect_left(self.natural_ids, natural_key(low)) if low else 0
+        end = bisect.bisect_right(self.natural_ids, natural_key(high)) if high else len(self.natural_ids)
+        return self.natural_positions[start:end]
+
+    def search(
+        self,
+        q: Optional[str] = None,
+        id_prefix: Optional[str] = None,
+        id_from: Optional[str] = None,
+        id_to: Optional[str] = None,
+        section: Optional[str] = None,
+        status: Optional[str] = None,
+        form: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> dict:
+        """Requirements matching every given criterion, in sheet order."""
+        candidates = []  # sorted lists or sets of positions, one per criterion
+        for token in tokenize(q or ""):
+            candidates.append(self.tokens.get(token, []))
+        if id_prefix:
+            candidates.append(self._id_prefix(id_prefix))
+        if id_from or id_to:
+            candidates.append(self._id_range(id_from, id_to))
+        for field, value in (("section", section), ("status", status), ("form", form)):
+            if value:
+                candidates.append(self.exact[field].get(value.lower(), []))
+
+        if not candidates:
+            total = len(self.records)
+            page = range(offset, min(total, offset + limit))
+            return {"total": total, "results": [self.records[p] for p in page], "facets": self.facets}
+
+        # Intersect smallest first so the work is bounded by the rarest criterion
+        candidates.sort(key=len)
+        matched = set(candidates[0])
+        for other in candidates[1:]:
+            if not matched:
+                break
+            matched.intersection_update(other)
+        positions = sorted(matched)
+        return {
+            "total": len(positions),
+            "results": [self.records[p] for p in positions[offset:offset + limit]],
+            "facets": self._facet_counts(positions),
+        }
+
+
+class IndexCache:
+    """TTL + LRU cache of RequirementIndex by upload key."""
+
+    def __init__(self, ttl_seconds: float = SEARCH_CACHE_TTL_SECONDS, max_entries: int = SEARCH_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[RequirementIndex]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._entries[key]
+                return None
+            # Sliding expiry: an index stays while reviewers keep querying it
+            self._entries[key] = (now + self.ttl_seconds, entry[1])
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: str, index: RequirementIndex) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, index)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+index_cache = IndexCache()
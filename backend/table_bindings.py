@@ -0,0 +1,110 @@
+"""
+Table bindings: which workbook data fills which table of the BRD template.
+
+By default only the Functional Requirements table ("Requirement ID /
+Section / Description / Status") is filled, from the request's sheet. A
+binding spec lists several tables, each identified by its header
+signature and fed from its own sheet, filter and column profile:
+
+    {"tables": [
+        {"headers": ["requirement id", "section", "description", "status"]},
+        {"headers": ["nfr id", "category", "description", "status"],
+         "sheet": "NFR", "filter_mode": "final", "column_profile": "nfr"},
+        {"headers": ["requirement id", "test case"], "fields": ["req_id", "description"],
+         "sheet": "Traceability", "column_profile": "trace", "form_headers": false}
+    ]}
+
+A table matches when it has one column per header and each header cell
+contains the corresponding signature text (case-insensitive). "fields"
+names the requirement field written to each column (default req_id,
+section, description, status); with "form_headers": false the table gets
+no merged form rows and every requirement is written, including rows
+above the first Form value. Omitted keys fall back to the request's
+sheet_name, filter_mode and column profile, and the default sort/group.
+
+The spec comes from the /generate table_bindings field or, when absent,
+the JSON file named by TABLE_BINDINGS_FILE.
+"""
+import json
+import logging
+import os
+from typing import List, NamedTuple, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from column_mapping import FIELDS, resolve_ordering
+
+load_dotenv()
+
+logger = logging.getLogger("brd-utility")
+
+TABLE_BINDINGS_FILE = os.getenv("TABLE_BINDINGS_FILE", "")
+
+DEFAULT_FIELDS = ("req_id", "section", "description", "status")
+_OPTIONAL_KEYS = ("sheet", "filter_mode", "column_profile", "sort_by", "group_by")
+
+
+class TableBinding(NamedTuple):
+    headers: Tuple[str, ...]  # lowercase text each header cell must contain
+    fields: Tuple[str, ...] = DEFAULT_FIELDS
+    sheet: Optional[str] = None
+    filter_mode: Optional[str] = None
+    column_profile: Optional[str] = None
+    sort_by: Optional[str] = None
+    group_by: Optional[str] = None
+    form_headers: bool = True
+
+
+def parse_bindings(text: str) -> List[TableBinding]:
+    """Validate a binding spec (JSON text); raises ValueError describing the first problem."""
+    try:
+        spec = json.loads(text)
+    except ValueError:
+        raise ValueError("table_bindings is not valid JSON")
+    tables = spec.get("tables") if isinstance(spec, dict) else None
+    if not isinstance(tables, list) or not tables:
+        raise ValueError("table_bindings must be an object with a non-empty 'tables' list")
+
+    bindings = []
+    for number, entry in enumerate(tables, start=1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"table binding {number} must be an object")
+        headers = entry.get("headers")
+        if not isinstance(headers, list) or not headers or not all(isinstance(h, str) and h.strip() for h in headers):
+            raise ValueError(f"table binding {number} needs a non-empty 'headers' list of strings")
+        fields = entry.get("fields", list(DEFAULT_FIELDS))
+        if not isinstance(fields, list) or any(f not in FIELDS for f in fields):
+            raise ValueError(f"table binding {number} 'fields' must list fields from {list(FIELDS)}")
+        if len(fields) != len(headers):
+            raise ValueError(f"table binding {number} needs one field per header ({len(headers)})")
+        options = {key: entry.get(key) for key in _OPTIONAL_KEYS}
+        if any(value is not None and not isinstance(value, str) for value in options.values()):
+            raise ValueError(f"table binding {number} options {list(_OPTIONAL_KEYS)} must be strings")
+        try:
+            resolve_ordering(options["sort_by"], options["group_by"])
+        except ValueError as e:
+            raise ValueError(f"table binding {number} {str(e)}")
+        form_headers = entry.get("form_headers", True)
+        if not isinstance(form_headers, bool):
+            raise ValueError(f"table binding {number} 'form_headers' must be true or false")
+        bindings.append(TableBinding(
+            headers=tuple(h.strip().lower() for h in headers),
+            fields=tuple(fields),
+            form_headers=form_headers,
+            **options,
+        ))
+    return bindings
+
+
+def _load_default_bindings() -> Optional[List[TableBinding]]:
+    if not TABLE_BINDINGS_FILE:
+        return None
+    try:
+        with open(TABLE_BINDINGS_FILE, encoding="utf-8") as f:
+            return parse_bindings(f.read())
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not load table bindings from {TABLE_BINDINGS_FILE}: {str(e)}")
+        return None
+
+
+DEFAULT_BINDINGS = _load_default_bindings()
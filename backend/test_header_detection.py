@@ -0,0 +1,88 @@
+"""
+Test script to verify that /sheets and /generate agree on where the header row is
+when title and blank rows sit above it.
+"""
+import os
+import sys
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+# Fix Unicode encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+# Users live in a throwaway SQLite file; set before main reads the environment
+_db_dir = tempfile.TemporaryDirectory()
+os.environ["DB_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(_db_dir.name, "users.db")
+
+# Add parent directory to path to import from main.py
+sys.path.insert(0, str(Path(__file__).parent))
+
+import openpyxl
+from fastapi.testclient import TestClient
+
+from column_mapping import HEADER_SCAN_ROWS
+from main import app
+
+HEADERS = ["Form", "Req ID#", "Section", "Description", "Status"]
+
+
+def make_workbook(header_row: int) -> bytes:
+    """A title in row 1, blank rows, then the header at header_row and two requirements."""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Requirements"
+    ws.cell(row=1, column=1, value="Study PRJ requirements export")
+    for column, header in enumerate(HEADERS, start=1):
+        ws.cell(row=header_row, column=column, value=header)
+    ws.append(["Demographics", "PRJ_01.01", "Subject", "Capture age", "Approved"])
+    ws.append(["Demographics", "PRJ_01.02", "Subject", "Capture sex", "Approved"])
+    out = BytesIO()
+    wb.save(out)
+    return out.getvalue()
+
+
+def check(client, headers, header_row: int):
+    excel_bytes = make_workbook(header_row)
+    files = {"excel": ("requirements.xlsx", excel_bytes)}
+
+    sheet = client.post("/sheets", files=files, headers=headers).json()["sheets"][0]
+    generated = client.post("/generate", files=files, headers=headers)
+    print(f"Header in row {header_row}: /sheets header_row={sheet['header_row']}, /generate status={generated.status_code}")
+
+    if header_row <= HEADER_SCAN_ROWS:
+        assert sheet["header_row"] == header_row
+        assert sheet["missing_columns"] == []
+        assert {field: column["column"] for field, column in sheet["header_columns"].items()} == {
+            "form": "A", "req_id": "B", "section": "C", "description": "D", "status": "E",
+        }
+        assert generated.status_code == 200, generated.text
+    else:
+        # Past the scan window: neither finds the header
+        assert sheet["header_row"] is None
+        assert sheet["header_columns"] == {}
+        assert generated.status_code == 400
+        assert "Missing required Excel columns" in generated.json()["error"]
+
+
+def test_header_detection():
+    """Test that /sheets reports a header row exactly when /generate can use it"""
+    with TestClient(app) as client:
+        client.post("/api/auth/register", json={
+            "username": "header-test", "email": "header-test@example.com", "password": "header-test",
+        })
+        token = client.post("/api/auth/login", json={
+            "username": "header-test", "password": "header-test",
+        }).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        # Inside the scan window, on its last row, and just past it
+        for row in (3, HEADER_SCAN_ROWS, HEADER_SCAN_ROWS + 5):
+            check(client, headers, row)
+
+
+if __name__ == "__main__":
+    test_header_detection()
+    print("\n✅ ALL CHECKS PASSED!")
@@ -0,0 +1,69 @@
+"""
+Test script to verify that style-based formatting renders the Functional
+Requirements table the same way direct formatting does, including on
+templates whose table grid has no column widths
+"""
+import sys
+from io import BytesIO
+from pathlib import Path
+
+from docx import Document
+from docx.oxml.ns import qn
+
+# Fix Unicode encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+# Add parent directory to path to import from main.py
+sys.path.insert(0, str(Path(__file__).parent))
+
+from docx_renderer import render_docx
+
+REQUIREMENTS = [
+    {
+        "form": "Demographics",
+        "requirements": [
+            {"req_id": "PRJ_01.01", "section": "Subject", "description": "Capture age", "status": "Approved"},
+            {"req_id": "PRJ_01.02", "section": "Subject", "description": "Capture sex", "status": "Approved"},
+        ],
+    },
+]
+
+
+def make_template() -> bytes:
+    """A Functional Requirements table whose w:gridCol elements carry no w:w."""
+    doc = Document()
+    doc.add_heading("Functional Requirements", level=1)
+    table = doc.add_table(rows=1, cols=4)
+    for cell, header in zip(table.rows[0].cells, ["Requirement ID", "Section", "Description", "Status"]):
+        cell.text = header
+    for grid_col in table._tbl.tblGrid.findall(qn("w:gridCol")):
+        grid_col.attrib.pop(qn("w:w"), None)
+    for tc in table._tbl.tr_lst[0].tc_lst:
+        tc.remove(tc.tcPr)
+    out = BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+
+def table_text(docx_bytes: bytes) -> list:
+    table = Document(BytesIO(docx_bytes)).tables[0]
+    return [[cell.text for cell in row.cells] for row in table.rows]
+
+
+def test_styles_without_grid_widths():
+    """Test that formatting=styles works on a gridCol with no width and matches formatting=direct"""
+    template_bytes = make_template()
+
+    direct = table_text(render_docx(template_bytes, REQUIREMENTS, formatting="direct").getvalue())
+    styled = table_text(render_docx(template_bytes, REQUIREMENTS, formatting="styles").getvalue())
+
+    assert len(styled) == 4, f"expected header, form and 2 requirement rows, got {len(styled)}"
+    assert styled == direct
+    assert styled[2] == ["PRJ_01.01", "Subject", "Capture age", "Approved"]
+    print("✓ SUCCESS: styled rows render on a template without grid widths")
+
+
+if __name__ == "__main__":
+    test_styles_without_grid_widths()
+    print("\n✅ ALL CHECKS PASSED!")
@@ -0,0 +1,91 @@
+"""
+Read-through cache for user lookups by username.
+
+`/api/auth/me` runs on every frontend page load and login runs on every
+sign-in; both resolve the user by username. Entries live for a short TTL and
+are dropped explicitly when a user is created or updated, so a stale profile
+can be served for at most USER_CACHE_TTL_SECONDS after an out-of-band change.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))  # 0 disables caching
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "1024"))
+
+
+class UserCache:
+    """TTL + LRU cache of user dicts keyed by case-insensitive username."""
+
+    def __init__(self, ttl_seconds: float = USER_CACHE_TTL_SECONDS, max_entries: int = USER_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    @staticmethod
+    def _key(username: str) -> str:
+        # Usernames are unique case-insensitively in both storage backends
+        return username.lower()
+
+    def get(self, username: str, loader: Callable[[str], Optional[Dict]]) -> Optional[Dict]:
+        """Return the cached user, or load it with loader(username) and cache it."""
+        if not self.enabled:
+            return loader(username)
+
+        key = self._key(username)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        user = loader(username)
+        # Unknown users are not cached: registration would have to invalidate them
+        if user is not None:
+            with self._lock:
+                self._entries[key] = (now + self.ttl_seconds, user)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return user
+
+    def invalidate(self, username: str) -> None:
+        with self._lock:
+            if self._entries.pop(self._key(username), None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+user_cache = UserCache()
@@ -0,0 +1,108 @@
+"""
+Background preloading and warm-up of the generation code paths.
+
+main.py does not import pandas, openpyxl or python-docx at module import
+time, so the server starts answering /health and the auth routes as soon as
+FastAPI is up. This module imports them on a daemon thread after startup so
+the first /generate does not pay for the imports either.
+
+The optional full warm-up (WARMUP_ON_STARTUP) goes further: it runs a tiny
+synthetic workbook through parse_excel_to_requirements and render_docx with
+the server template, which also reads and caches the template and exercises
+lxml, the openpyxl reader and the header regex once.
+"""
+import importlib
+import logging
+import threading
+import time
+from io import BytesIO
+from typing import Dict
+
+logger = logging.getLogger("brd-utility")
+
+# openpyxl is listed explicitly because pandas only imports it inside read_excel
+PRELOAD_MODULES = ("excel_parser", "openpyxl", "docx_renderer")
+
+_preload_thread = None
+_warmup_thread = None
+
+# Reported by get_warmup_status(): state is idle | running | done | failed
+_warmup_status: Dict = {"state": "idle", "duration_s": None, "error": None}
+
+
+def preload_modules() -> float:
+    """Import PRELOAD_MODULES and return the elapsed seconds."""
+    start = time.perf_counter()
+    for module_name in PRELOAD_MODULES:
+        importlib.import_module(module_name)
+    elapsed = time.perf_counter() - start
+    logger.info(f"Preloaded {', '.join(PRELOAD_MODULES)} in {elapsed:.2f}s")
+    return elapsed
+
+
+def _run_preload():
+    try:
+        preload_modules()
+    except Exception as e:
+        # Requests will retry the import on first use and surface the error there
+        logger.error(f"Background preload failed: {str(e)}")
+
+
+def start_preload() -> threading.Thread:
+    """Start preloading on a daemon thread (once per process)."""
+    global _preload_thread
+    if _preload_thread is None:
+        _preload_thread = threading.Thread(target=_run_preload, name="brd-preload", daemon=True)
+        _preload_thread.start()
+    return _preload_thread
+
+
+def _synthetic_workbook() -> bytes:
+    """A two-requirement workbook with the expected headers."""
+    import openpyxl
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["Form", "Req ID#*", "Section*", "Description *", "Status *"])
+    sheet.append(["Warm-up Form", "WARMUP_01.01", "Warm-up", "Warm-up requirement", "Final"])
+    sheet.append(["Warm-up Form", "WARMUP_01.02", "Warm-up", "Warm-up requirement", "Approved"])
+    out = BytesIO()
+    workbook.save(out)
+    return out.getvalue()
+
+
+def warm_up() -> float:
+    """Run the synthetic workbook through parse and render. Returns elapsed seconds."""
+    start = time.perf_counter()
+    preload_modules()
+
+    from excel_parser import parse_excel_to_requirements
+    from docx_renderer import load_server_template, render_docx
+
+    requirements = parse_excel_to_requirements(_synthetic_workbook(), filter_mode="none")
+    render_docx(load_server_template(), requirements)
+    elapsed = time.perf_counter() - start
+    logger.info(f"Warm-up of parse/render finished in {elapsed:.2f}s")
+    return elapsed
+
+
+def _run_warmup():
+    _warmup_status.update(state="running")
+    try:
+        _warmup_status.update(state="done", duration_s=round(warm_up(), 4))
+    except Exception as e:
+        _warmup_status.update(state="failed", error=str(e))
+        logger.error(f"Background warm-up failed: {str(e)}")
+
+
+def start_warmup() -> threading.Thread:
+    """Start the full warm-up on a daemon thread (once per process)."""
+    global _warmup_thread
+    if _warmup_thread is None:
+        _warmup_thread = threading.Thread(target=_run_warmup, name="brd-warmup", daemon=True)
+        _warmup_thread.start()
+    return _warmup_thread
+
+
+def get_warmup_status() -> Dict:
+    return dict(_warmup_status)
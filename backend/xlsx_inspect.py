@@ -0,0 +1,222 @@
+"""
+Cheap structural reads of .xlsx packages without loading cell data.
+
+An .xlsx is a zip of XML parts. Sheet names live in xl/workbook.xml, their
+part paths in xl/_rels/workbook.xml.rels, and each sheet part normally
+starts with a <dimension ref="A1:E5001"/> element before any cell data.
+Reading just those gives sheet names and sizes in milliseconds, however
+large the workbook is.
+
+read_head_rows() goes one step further and stream-parses only the first
+rows of a sheet part, resolving just the shared strings those rows use, so
+the header row of every sheet can be found without loading cell data.
+"""
+import posixpath
+import re
+import zipfile
+from io import BytesIO
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from xml.etree import ElementTree
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_DOC_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+# <dimension> precedes <sheetData>, so it sits within the first few KB of a sheet part
+DIMENSION_SCAN_BYTES = 64 * 1024
+_DIMENSION_RE = re.compile(rb'<(?:\w+:)?dimension\s+ref="([A-Z]+)?(\d+)?(?::([A-Z]+)(\d+))?"')
+
+_CELL_REF_RE = re.compile(r"([A-Z]+)(\d*)")
+
+# Fallback when a writer omits <dimension>: typical uncompressed bytes per row
+BYTES_PER_ROW_FALLBACK = 300
+
+
+def open_package(data: bytes) -> zipfile.ZipFile:
+    """Open an OOXML package, raising ValueError if it is not a zip file."""
+    try:
+        return zipfile.ZipFile(BytesIO(data))
+    except zipfile.BadZipFile:
+        raise ValueError("Uploaded file is not a valid .xlsx/.docx (zip) package")
+
+
+def list_sheets(zf: zipfile.ZipFile) -> List[Tuple[str, str]]:
+    """[(sheet name, part path), ...] in workbook order."""
+    try:
+        workbook = ElementTree.fromstring(zf.read("xl/workbook.xml"))
+        rels = ElementTree.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    except KeyError:
+        raise ValueError("Uploaded file is not an Excel workbook (xl/workbook.xml missing)")
+
+    targets = {}
+    for rel in rels.iter(f"{{{NS_PKG_REL}}}Relationship"):
+        target = rel.get("Target", "")
+        # Targets are relative to xl/ unless absolute
+        targets[rel.get("Id")] = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+
+    sheets = []
+    for sheet in workbook.iter(f"{{{NS_MAIN}}}sheet"):
+        part = targets.get(sheet.get(f"{{{NS_DOC_REL}}}id"))
+        if part:
+            sheets.append((sheet.get("name"), part))
+    return sheets
+
+
+def shared_strings_part(zf: zipfile.ZipFile) -> Optional[str]:
+    """Path of the shared strings part, or None if the workbook has none."""
+    try:
+        rels = ElementTree.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    except KeyError:
+        return None
+    for rel in rels.iter(f"{{{NS_PKG_REL}}}Relationship"):
+        if rel.get("Type", "").endswith("/sharedStrings"):
+            target = rel.get("Target", "")
+            return target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+    return None
+
+
+def _column_number(letters: str) -> int:
+    number = 0
+    for ch in letters:
+        number = number * 26 + ord(ch) - 64
+    return number
+
+
+def column_letters(number: int) -> str:
+    """1 -> "A", 27 -> "AA"."""
+    letters = ""
+    while number:
+        number, rest = divmod(number - 1, 26)
+        letters = chr(65 + rest) + letters
+    return letters
+
+
+def _string_item_text(item) -> str:
+    # Plain <si><t> or rich text runs <si><r><t>; phonetic runs (<rPh>) are not text
+    parts = []
+    for child in item:
+        if child.tag == f"{{{NS_MAIN}}}t":
+            parts.append(child.text or "")
+        elif child.tag == f"{{{NS_MAIN}}}r":
+            parts.extend(t.text or "" for t in child.iter(f"{{{NS_MAIN}}}t"))
+    return "".join(parts)
+
+
+def read_shared_strings(zf: zipfile.ZipFile, indices: Set[int]) -> Dict[int, str]:
+    """
+    {index: text} for the requested shared string indices, stream-parsing
+    the shared strings part only up to the highest index asked for.
+    """
+    part = shared_strings_part(zf)
+    if not indices or part is None or part not in zf.namelist():
+        return {}
+    last = max(indices)
+    found: Dict[int, str] = {}
+    index = 0
+    with zf.open(part) as stream:
+        for _, element in ElementTree.iterparse(stream, events=("end",)):
+            if element.tag != f"{{{NS_MAIN}}}si":
+                continue
+            if index in indices:
+                found[index] = _string_item_text(element)
+            element.clear()
+            if index >= last:
+                break
+            index += 1
+    return found
+
+
+def read_head_rows(zf: zipfile.ZipFile, part: str, max_rows: int) -> List[Tuple[int, list]]:
+    """
+    [(row number, values)] for the non-empty rows among sheet rows 1 to
+    max_rows, values positioned by column (None for gaps). The limit is by
+    sheet row number, blank rows included, the same way the parser scans
+    for the header row. Shared-string cells hold the string index as an int
+    wrapped in a 1-tuple until resolved by resolve_head_rows(); other cells
+    hold their text.
+    """
+    rows: List[Tuple[int, list]] = []
+    if max_rows <= 0:
+        return rows
+    row_tag, cell_tag = f"{{{NS_MAIN}}}row", f"{{{NS_MAIN}}}c"
+    row_number = 0
+    with zf.open(part) as stream:
+        for _, element in ElementTree.iterparse(stream, events=("end",)):
+            if element.tag != row_tag:
+                continue
+            row_number = int(element.get("r") or row_number + 1)
+            if row_number > max_rows:
+                break
+            values: list = []
+            for cell in element.iter(cell_tag):
+                ref = _CELL_REF_RE.match(cell.get("r", ""))
+                position = _column_number(ref.group(1)) - 1 if ref else len(values)
+                kind = cell.get("t", "n")
+                if kind == "inlineStr":
+                    value = "".join(t.text or "" for t in cell.iter(f"{{{NS_MAIN}}}t"))
+                else:
+                    v = cell.find(f"{{{NS_MAIN}}}v")
+                    if v is None or v.text is None:
+                        continue
+                    value = (int(v.text),) if kind == "s" else v.text
+                values.extend([None] * (position + 1 - len(values)))
+                values[position] = value
+            element.clear()
+            if any(value not in (None, "") for value in values):
+                rows.append((row_number, values))
+    return rows
+
+
+def resolve_head_rows(zf: zipfile.ZipFile, sheets_rows: Iterable[List[Tuple[int, list]]]) -> None:
+    """Replace shared-string placeholders from read_head_rows() with their text, in place."""
+    sheets_rows = list(sheets_rows)
+    indices = {
+        value[0] for rows in sheets_rows for _, values in rows for value in values if isinstance(value, tuple)
+    }
+    strings = read_shared_strings(zf, indices)
+    for rows in sheets_rows:
+        for _, values in rows:
+            for position, value in enumerate(values):
+                if isinstance(value, tuple):
+                    values[position] = strings.get(value[0], "")
+
+
+def read_dimension(zf: zipfile.ZipFile, part: str) -> Optional[Tuple[int, int]]:
+    """(rows, columns) from the sheet's <dimension> element, or None if absent."""
+    with zf.open(part) as stream:
+        head = stream.read(DIMENSION_SCAN_BYTES)
+    match = _DIMENSION_RE.search(head)
+    if not match:
+        return None
+    first_col, first_row, last_col, last_row = (g.decode("ascii") if g else None for g in match.groups())
+    if last_row is None:
+        # Single-cell ref such as "A1"
+        return (int(first_row or 1), 1)
+    rows = int(last_row) - int(first_row or 1) + 1
+    cols = _column_number(last_col) - _column_number(first_col or "A") + 1
+    return (rows, cols)
+
+
+def resolve_sheet(zf: zipfile.ZipFile, sheet_name: Optional[str]) -> Tuple[str, str]:
+    """(name, part) of sheet_name, or of the first sheet when sheet_name is empty."""
+    sheets = list_sheets(zf)
+    if not sheets:
+        raise ValueError("Workbook contains no sheets")
+    if not sheet_name:
+        return sheets[0]
+    for name, part in sheets:
+        if name == sheet_name:
+            return name, part
+    raise ValueError(f"Worksheet named '{sheet_name}' not found")
+
+
+def estimate_sheet_rows(zf: zipfile.ZipFile, sheet_name: Optional[str] = None) -> int:
+    """
+    Row count of the target sheet from its <dimension>, falling back to the
+    part's uncompressed size (from the zip central directory) when absent.
+    """
+    _, part = resolve_sheet(zf, sheet_name)
+    dimension = read_dimension(zf, part)
+    if dimension is not None:
+        return dimension[0]
+    return zf.getinfo(part).file_size // BYTES_PER_ROW_FALLBACK
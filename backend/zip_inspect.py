@@ -0,0 +1,122 @@
+"""
+Pre-flight inspection of uploaded .xlsx/.docx packages.
+
+Both upload types are zip containers that pandas/openpyxl and python-docx
+decompress in full. This inspector reads only the zip central directory
+(plus the first few KB of the target sheet for its <dimension>), so zip
+bombs and oversized sheets are refused before pd.read_excel or Document()
+ever runs. Declared sizes can be trusted: zipfile stops reading an entry at
+its declared size, so a lying central directory cannot inflate it later.
+
+Limits (env vars):
+
+- UPLOAD_MAX_UNCOMPRESSED_MB: total uncompressed size of all parts (413)
+- UPLOAD_MAX_COMPRESSION_RATIO: per part, for parts over 1 MB (413)
+- UPLOAD_MAX_PARTS: number of zip entries (413)
+- UPLOAD_MAX_SHEET_ROWS / UPLOAD_MAX_SHEET_COLUMNS: target sheet dimension (413)
+  (writers that omit <dimension>, e.g. openpyxl write-only mode, are bounded
+  by the total-size limit only)
+
+Malformed, encrypted or wrong-type packages are rejected with 400.
+"""
+import os
+import zipfile
+from typing import NamedTuple, Optional
+
+from dotenv import load_dotenv
+
+from xlsx_inspect import open_package, read_dimension, resolve_sheet
+
+load_dotenv()
+
+UPLOAD_MAX_UNCOMPRESSED_MB = float(os.getenv("UPLOAD_MAX_UNCOMPRESSED_MB", "500"))
+UPLOAD_MAX_COMPRESSION_RATIO = float(os.getenv("UPLOAD_MAX_COMPRESSION_RATIO", "100"))
+UPLOAD_MAX_PARTS = int(os.getenv("UPLOAD_MAX_PARTS", "10000"))
+UPLOAD_MAX_SHEET_ROWS = int(os.getenv("UPLOAD_MAX_SHEET_ROWS", "500000"))
+UPLOAD_MAX_SHEET_COLUMNS = int(os.getenv("UPLOAD_MAX_SHEET_COLUMNS", "1000"))
+
+# Small parts (shared strings of a tiny sheet, empty XML) compress extremely
+# well legitimately; only ratios of parts above this size are checked
+RATIO_CHECK_MIN_BYTES = 1 * 2**20
+
+# Part that must exist for each package kind
+REQUIRED_PARTS = {
+    "xlsx": "xl/workbook.xml",
+    "docx": "word/document.xml",
+}
+
+MB = 2**20
+
+
+class UploadRejected(Exception):
+    """Upload refused before parsing; status_code is 400 or 413."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        self.status_code = status_code
+        super().__init__(message)
+
+
+class PackageInfo(NamedTuple):
+    parts: int
+    compressed_bytes: int
+    uncompressed_bytes: int
+    sheet_rows: Optional[int] = None
+    sheet_columns: Optional[int] = None
+
+
+def inspect_upload(data: bytes, kind: str, label: str = "upload", sheet_name: Optional[str] = None) -> PackageInfo:
+    """
+    Validate an uploaded package of the given kind ("xlsx" or "docx") from its
+    zip metadata. Raises UploadRejected; returns PackageInfo when it passes.
+    """
+    try:
+        zf = open_package(data)
+    except ValueError:
+        raise UploadRejected(f"The {label} is not a valid .{kind} file")
+
+    with zf:
+        infos = zf.infolist()
+        if len(infos) > UPLOAD_MAX_PARTS:
+            raise UploadRejected(f"The {label} has {len(infos)} parts (limit {UPLOAD_MAX_PARTS})", 413)
+
+        names = set()
+        compressed = uncompressed = 0
+        for info in infos:
+            if info.flag_bits & 0x1:
+                raise UploadRejected(f"The {label} is encrypted or password protected")
+            names.add(info.filename)
+            compressed += info.compress_size
+            uncompressed += info.file_size
+            if (
+                info.file_size > RATIO_CHECK_MIN_BYTES
+                and info.file_size > info.compress_size * UPLOAD_MAX_COMPRESSION_RATIO
+            ):
+                ratio = info.file_size / max(1, info.compress_size)
+                raise UploadRejected(
+                    f"The {label} part '{info.filename}' expands {ratio:.0f}x "
+                    f"(limit {UPLOAD_MAX_COMPRESSION_RATIO:.0f}x); refusing a likely zip bomb", 413)
+
+        if uncompressed > UPLOAD_MAX_UNCOMPRESSED_MB * MB:
+            raise UploadRejected(
+                f"The {label} expands to {uncompressed / MB:.0f} MB "
+                f"(limit {UPLOAD_MAX_UNCOMPRESSED_MB:.0f} MB)", 413)
+
+        required = REQUIRED_PARTS[kind]
+        if required not in names:
+            raise UploadRejected(f"The {label} is not a .{kind} file ({required} missing)")
+
+        if kind != "xlsx":
+            return PackageInfo(len(infos), compressed, uncompressed)
+
+        try:
+            sheet, part = resolve_sheet(zf, sheet_name)
+            dimension = read_dimension(zf, part)
+        except (ValueError, KeyError, zipfile.BadZipFile) as e:
+            raise UploadRejected(str(e))
+
+    rows, columns = dimension if dimension else (None, None)
+    if rows is not None and rows > UPLOAD_MAX_SHEET_ROWS:
+        raise UploadRejected(f"Sheet '{sheet}' has {rows} rows (limit {UPLOAD_MAX_SHEET_ROWS})", 413)
+    if columns is not None and columns > UPLOAD_MAX_SHEET_COLUMNS:
+        raise UploadRejected(f"Sheet '{sheet}' has {columns} columns (limit {UPLOAD_MAX_SHEET_COLUMNS})", 413)
+    return PackageInfo(len(infos), compressed, uncompressed, rows, columns)